@@ -1,46 +1,187 @@
 # custom_components/centralite/__init__.py
 import logging
+import re
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.const import Platform
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers import entity_registry as er
+from homeassistant.util import slugify
 from .hub import CentraliteHub
+from .pycentralite import CAPTURE_BACKUPS, CAPTURE_MAX_BYTES, TRACE_SIZE, Centralite
 
 DOMAIN = "centralite"
-PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.SCENE, Platform.SWITCH]
+PLATFORMS: list[Platform] = [Platform.LIGHT, Platform.SCENE, Platform.SENSOR, Platform.SWITCH]
+
+SERVICE_START_CAPTURE = "start_capture"
+SERVICE_STOP_CAPTURE = "stop_capture"
+SERVICE_SET_TRACE = "set_trace"
+SERVICE_DUMP_TRACE = "dump_trace"
+
+_TARGET = {vol.Optional("config_entry_id"): cv.string}
+START_CAPTURE_SCHEMA = vol.Schema({
+    **_TARGET,
+    vol.Optional("max_size_kb", default=CAPTURE_MAX_BYTES // 1024): vol.All(vol.Coerce(int), vol.Range(min=4)),
+    vol.Optional("backups", default=CAPTURE_BACKUPS): vol.All(vol.Coerce(int), vol.Range(min=0, max=20)),
+})
+STOP_CAPTURE_SCHEMA = vol.Schema(_TARGET)
+SET_TRACE_SCHEMA = vol.Schema({
+    **_TARGET,
+    vol.Required("enabled"): cv.boolean,
+    vol.Optional("size", default=TRACE_SIZE): vol.All(vol.Coerce(int), vol.Range(min=1, max=10000)),
+})
+DUMP_TRACE_SCHEMA = vol.Schema(_TARGET)
 
 _LOGGER = logging.getLogger(__name__)
 
+# Config entry version 2: editable settings live in options, unique_ids are the padded,
+# name-keyed ones below. Older unique_ids, from the YAML platform or early entries:
+_LEGACY_LOAD = re.compile(r"elegance\.L(\d+)|.+\.load\.(\d+)")
+_LEGACY_SWITCH = re.compile(r"(?:elegance|.+\.switch)\.SW0*(\d+)")
+_LEGACY_SCENE = re.compile(r"(?:elegance\.scene|.+\.scene\.)(\d+)\.?(ON|OFF)")
+
 def _merged(entry: ConfigEntry) -> dict:
     data = dict(entry.data)
     data.update(entry.options or {})
     return data
 
+def _target_hubs(hass: HomeAssistant, call: ServiceCall) -> list[CentraliteHub]:
+    hubs = hass.data.get(DOMAIN, {})
+    entry_id = call.data.get("config_entry_id")
+    return [hubs[entry_id]] if entry_id in hubs else ([] if entry_id else list(hubs.values()))
+
 async def async_setup(hass: HomeAssistant, config: dict):
+    async def _start_capture(call: ServiceCall) -> None:
+        for hub in _target_hubs(hass, call):
+            path = await hub.async_start_capture(call.data["max_size_kb"] * 1024, call.data["backups"])
+            _LOGGER.warning("Centralite wire capture running, writing to %s", path)
+
+    async def _stop_capture(call: ServiceCall) -> None:
+        for hub in _target_hubs(hass, call):
+            path = await hub.async_stop_capture()
+            if path:
+                _LOGGER.warning("Centralite wire capture saved to %s", path)
+
+    async def _set_trace(call: ServiceCall) -> None:
+        for hub in _target_hubs(hass, call):
+            if call.data["enabled"]:
+                hub.controller.enable_trace(call.data["size"])
+            else:
+                hub.controller.disable_trace()
+
+    async def _dump_trace(call: ServiceCall) -> ServiceResponse:
+        return {hub.entry_id: hub.controller.trace_dump() for hub in _target_hubs(hass, call)}
+
+    hass.services.async_register(DOMAIN, SERVICE_START_CAPTURE, _start_capture, schema=START_CAPTURE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_STOP_CAPTURE, _stop_capture, schema=STOP_CAPTURE_SCHEMA)
+    hass.services.async_register(DOMAIN, SERVICE_SET_TRACE, _set_trace, schema=SET_TRACE_SCHEMA)
+    hass.services.async_register(
+        DOMAIN, SERVICE_DUMP_TRACE, _dump_trace, schema=DUMP_TRACE_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
     return True
 
+def _scene_keys(scenes: dict[str, str] | None) -> dict[str, str]:
+    scenes = scenes or Centralite.ACTIVE_SCENES_DICT
+    return {str(int(sid)): slugify(name) for sid, name in scenes.items()}
+
+def _migrated_unique_id(entry_id: str, uid: str, sid_to_key: dict[str, str]) -> str | None:
+    """The version 2 unique_id for a legacy one, or None when it is current or can't be mapped."""
+    if m := _LEGACY_LOAD.fullmatch(uid):
+        new_uid = f"{entry_id}.load.{int(m.group(1) or m.group(2)):03d}"
+    elif m := _LEGACY_SWITCH.fullmatch(uid):
+        new_uid = f"{entry_id}.switch.SW{int(m.group(1)):03d}"
+    elif m := _LEGACY_SCENE.fullmatch(uid):
+        key = sid_to_key.get(str(int(m.group(1))))
+        if not key:
+            return None  # scene id was removed/renamed; leave it orphaned by design
+        new_uid = f"{entry_id}.scene.{key}.{m.group(2)}"
+    else:
+        return None
+    return new_uid if new_uid != uid else None
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Upgrade an entry once, on the first setup after an update; later setups skip it."""
+    if entry.version > 2:
+        return False  # written by a newer release
+    if entry.version == 1:
+        # data → options so the Options UI shows imported values
+        data, opts = dict(entry.data), dict(entry.options or {})
+        for k in ("loads_include", "switches_include", "scenes_map"):
+            if k in data and k not in opts:
+                opts[k] = data.pop(k)
+
+        sid_to_key = _scene_keys(opts.get("scenes_map") or data.get("scenes_map"))
+        reg = er.async_get(hass)
+        for ent in er.async_entries_for_config_entry(reg, entry.entry_id):
+            if ent.platform != DOMAIN:
+                continue
+            new_uid = _migrated_unique_id(entry.entry_id, ent.unique_id, sid_to_key)
+            if new_uid is None:
+                continue
+            try:
+                reg.async_update_entity(ent.entity_id, new_unique_id=new_uid)
+            except ValueError as e:  # an entity already has the new id
+                _LOGGER.warning("centralite: kept unique_id of %s: %s", ent.entity_id, e)
+
+        hass.config_entries.async_update_entry(entry, data=data, options=opts, version=2)
+        _LOGGER.debug("centralite: migrated entry %s to version 2", entry.entry_id)
+    return True
+
+def _adopt_yaml_entities(hass: HomeAssistant, entry: ConfigEntry, cfg: dict) -> None:
+    """Move YAML-era entities (elegance.* unique_ids, no config entry) onto this entry.
+
+    Only the unique_ids the YAML platform could have written, for the ids this entry or the
+    built-in lists know, are looked up; once renamed they no longer match, so later setups
+    find nothing.
+    """
+    sid_to_key = _scene_keys(cfg.get("scenes_map"))
+    candidates: dict[str, str] = {}
+    for n in {*Centralite.LOADS_LIST, *map(int, cfg.get("loads_include") or ())}:
+        candidates.update(dict.fromkeys((f"elegance.L{n}", f"elegance.L{n:03d}"), Platform.LIGHT))
+    for n in {*Centralite.SWITCHES_LIST, *map(int, cfg.get("switches_include") or ())}:
+        candidates.update(dict.fromkeys((f"elegance.SW{n}", f"elegance.SW{n:03d}"), Platform.SWITCH))
+    for sid in sid_to_key:
+        for state in ("ON", "OFF"):
+            candidates.update(dict.fromkeys((f"elegance.scene{sid}{state}", f"elegance.scene{sid}.{state}"), Platform.SCENE))
+
+    reg = er.async_get(hass)
+    for uid, domain in candidates.items():
+        entity_id = reg.async_get_entity_id(domain, DOMAIN, uid)
+        if entity_id is None or reg.async_get(entity_id).config_entry_id is not None:
+            continue
+        new_uid = _migrated_unique_id(entry.entry_id, uid, sid_to_key)
+        if new_uid is None:
+            continue
+        try:
+            reg.async_update_entity(entity_id, new_unique_id=new_uid)
+        except ValueError as e:  # this entry already has an entity with the new id
+            _LOGGER.warning("centralite: kept unique_id of %s: %s", entity_id, e)
+        else:
+            _LOGGER.debug("centralite: adopted YAML entity %s", entity_id)
+
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
-    # one-time data → options migration so Options UI shows imported values
-    moved, data, opts = False, dict(entry.data), dict(entry.options or {})
-    for k in ("loads_include", "switches_include", "scenes_map"):
-        if k in data and k not in opts:
-            opts[k] = data.pop(k); moved = True
-    if moved:
-        hass.config_entries.async_update_entry(entry, data=data, options=opts)
-
-    hub = CentraliteHub(hass, _merged(entry))
+    cfg = _merged(entry)
+    _adopt_yaml_entities(hass, entry, cfg)  # before the platforms create duplicates of them
+    hub = CentraliteHub(hass, cfg, entry.entry_id)
     await hub.async_setup()
 
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = hub
 
     async def _update_listener(hass, updated_entry):
-        await hass.config_entries.async_reload(updated_entry.entry_id)
+        # Applied in place: the link stays up and only affected entities are added/removed
+        await hub.async_update_options(_merged(updated_entry))
     entry.async_on_unload(entry.add_update_listener(_update_listener))
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     return True
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
-    hub: CentraliteHub = hass.data[DOMAIN].pop(entry.entry_id, None)
-    if hub:
-        await hub.async_close()
-    return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    # Entities go first (they unsubscribe from the controller), then the port is released,
+    # so a reload can reopen it without two readers sharing it
+    unloaded = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
+    if unloaded:
+        hub: CentraliteHub = hass.data[DOMAIN].pop(entry.entry_id, None)
+        if hub:
+            await hub.async_close()
+    return unloaded
@@ -0,0 +1,234 @@
+"""
+Centralite serial protocol codec.
+
+Inbound frames (bytes, CR already stripped) are parsed once into small message
+objects; outbound commands are typed requests that encode themselves.
+
+    ^KxxxYY   LoadLevel      load xxx is now at level YY (00-99)
+    P0xxx     SwitchPress    switch xxx pressed (leading digit is the board, 0 = single board)
+    R0xxx     SwitchRelease  switch xxx released
+    nnn       LevelReply     reply to ^Fxxx
+    48 hex    LoadBitmap     reply to ^G, on/off for 192 loads
+    96 hex    SwitchBitmap   reply to ^H, state of 384 switches
+"""
+from __future__ import annotations
+
+
+# ------------------------------- inbound ------------------------------- #
+class Message:
+    """Base for parsed inbound frames.
+
+    `received` (time.monotonic() when the reader got the frame's last byte) and `queued`
+    (when it was handed to the dispatcher) are set by Centralite for latency tracing; they
+    are not part of repr/equality and may be unset on messages built elsewhere.
+    """
+
+    __slots__ = ("received", "queued")
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, k) == getattr(other, k) for k in self.__slots__
+        )
+
+
+class LoadLevel(Message):
+    __slots__ = ("load", "level")
+
+    def __init__(self, load: int, level: int) -> None:
+        self.load = load
+        self.level = level
+
+
+class SwitchPress(Message):
+    __slots__ = ("switch",)
+
+    def __init__(self, switch: int) -> None:
+        self.switch = switch
+
+
+class SwitchRelease(Message):
+    __slots__ = ("switch",)
+
+    def __init__(self, switch: int) -> None:
+        self.switch = switch
+
+
+class LevelReply(Message):
+    __slots__ = ("level",)
+
+    def __init__(self, level: int) -> None:
+        self.level = level
+
+
+class LoadBitmap(Message):
+    """^G reply as a little-endian int: bit n-1 set = load n on."""
+
+    __slots__ = ("mask", "width")
+
+    def __init__(self, mask: int, width: int) -> None:
+        self.mask = mask
+        self.width = width
+
+
+class SwitchBitmap(Message):
+    """^H reply as a little-endian int: bit n-1 set = switch n on."""
+
+    __slots__ = ("mask", "width")
+
+    def __init__(self, mask: int, width: int) -> None:
+        self.mask = mask
+        self.width = width
+
+
+class Unknown(Message):
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: bytes) -> None:
+        self.raw = raw
+
+
+def hex_bitmap(text, group: int) -> tuple[int, int]:
+    """ASCII hex -> (little-endian int, bit count); trailing partial groups are ignored.
+
+    Each hex pair is one byte, LSB first, so byte k holds numbers 8k+1..8k+8.
+    Raises ValueError on non-hex input.
+    """
+    if not text:
+        return 0, 0
+    if isinstance(text, (bytes, bytearray)):
+        text = text.decode("ascii")
+    text = text.strip()
+    raw = bytes.fromhex(text[: len(text) // group * group])
+    return int.from_bytes(raw, "little"), len(raw) * 8
+
+
+_CARET, _K, _P, _R = 0x5E, 0x4B, 0x50, 0x52
+
+
+def parse_frame(frame: bytes) -> Message:
+    """Parse one CR-less frame. Never raises; anything unexpected becomes Unknown."""
+    n = len(frame)
+    try:
+        if n == 7 and frame[0] == _CARET and frame[1] == _K and frame[2:].isdigit():
+            load = int(frame[2:5])
+            if load >= 1:  # loads and switches are numbered from 1; 000 is line noise
+                return LoadLevel(load, int(frame[5:7]))
+        elif n == 5 and (frame[0] == _P or frame[0] == _R) and frame[1:].isdigit():
+            switch = int(frame[1:])
+            if switch >= 1:
+                return SwitchPress(switch) if frame[0] == _P else SwitchRelease(switch)
+        if 0 < n <= 3 and frame.isdigit():
+            return LevelReply(int(frame))
+        if n == 48:
+            return LoadBitmap(*hex_bitmap(frame, 6))
+        if n == 96:
+            return SwitchBitmap(*hex_bitmap(frame, 4))
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return Unknown(bytes(frame))
+
+
+# ------------------------------- outbound ------------------------------- #
+class Command:
+    """Base for outbound requests. `reply` is the Message type a query waits for."""
+
+    __slots__ = ()
+    reply: type[Message] | None = None
+
+    def encode(self) -> str:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.encode()!r})"
+
+
+class LoadCommand(Command):
+    """A command that sets one load; a later one for the same load supersedes it."""
+
+    __slots__ = ("load",)
+
+    def __init__(self, load: int) -> None:
+        self.load = int(load)
+
+
+class ActivateLoad(LoadCommand):
+    __slots__ = ()
+
+    def encode(self) -> str:
+        return "^A%03d" % self.load
+
+
+class DeactivateLoad(LoadCommand):
+    __slots__ = ()
+
+    def encode(self) -> str:
+        return "^B%03d" % self.load
+
+
+class SetLoadLevel(LoadCommand):
+    __slots__ = ("level", "rate")
+
+    def __init__(self, load: int, level: int, rate: int) -> None:
+        super().__init__(load)
+        self.level = int(level)
+        self.rate = int(rate)
+
+    def encode(self) -> str:
+        return "^E%03d%02d%02d" % (self.load, self.level, self.rate)
+
+
+class _Numbered(Command):
+    __slots__ = ("index",)
+    code = ""
+
+    def __init__(self, index: int) -> None:
+        self.index = int(index)
+
+    def encode(self) -> str:
+        return "%s%03d" % (self.code, self.index)
+
+
+class ActivateScene(_Numbered):
+    __slots__ = ()
+    code = "^C"
+
+
+class DeactivateScene(_Numbered):
+    __slots__ = ()
+    code = "^D"
+
+
+class PressSwitch(_Numbered):
+    __slots__ = ()
+    code = "^I"
+
+
+class ReleaseSwitch(_Numbered):
+    __slots__ = ()
+    code = "^J"
+
+
+class QueryLoadLevel(_Numbered):
+    __slots__ = ()
+    code = "^F"
+    reply = LevelReply
+
+
+class QueryLoads(Command):
+    __slots__ = ()
+    reply = LoadBitmap
+
+    def encode(self) -> str:
+        return "^G"
+
+
+class QuerySwitches(Command):
+    __slots__ = ()
+    reply = SwitchBitmap
+
+    def encode(self) -> str:
+        return "^H"
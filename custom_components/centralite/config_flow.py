@@ -11,8 +11,10 @@ from homeassistant.helpers.selector import selector
 from homeassistant import config_entries
 
 from . import DOMAIN
+from .hub import FLUSH_INTERVAL_MS
 
 MANUAL_VALUE = "__manual__"
+_FLUSH_SELECTOR = selector({"number": {"min": 0, "max": 500, "step": 5, "unit_of_measurement": "ms", "mode": "box"}})
 
 
 # ------------------------- helpers & parsers ------------------------- #
@@ -128,7 +130,7 @@ async def _probe_port(hass, port: str) -> str | None:
 
 # ------------------------------- Config Flow ------------------------------- #
 class CentraliteConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
-    VERSION = 1
+    VERSION = 2  # see async_migrate_entry
 
     async def async_step_import(self, user_input):
         # user_input is the dict from YAML (e.g., {"port": "...", "loads_include": [...], ...})
@@ -149,6 +151,8 @@ class CentraliteConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             data={
                 "port": chosen,
                 "include_switches": user_input.get("include_switches", False),
+                "reconcile": user_input.get("reconcile", True),
+                "flush_interval_ms": user_input.get("flush_interval_ms", FLUSH_INTERVAL_MS),
                 "exclude_names": user_input.get("exclude_names", []),
             },
             options={
@@ -222,12 +226,16 @@ class CentraliteConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     self._base = {
                         "port": chosen,
                         "include_switches": user_input.get("include_switches", False),
+                        "reconcile": user_input.get("reconcile", True),
+                        "flush_interval_ms": int(user_input.get("flush_interval_ms", FLUSH_INTERVAL_MS)),
                         "exclude_names": _parse_exclude(user_input.get("exclude_names", "")),
                     }
                     return await self.async_step_devices()
 
         schema = vol.Schema({
             vol.Required("include_switches", default=False): selector({"boolean": {}}),
+            vol.Optional("reconcile", default=True): selector({"boolean": {}}),
+            vol.Optional("flush_interval_ms", default=FLUSH_INTERVAL_MS): _FLUSH_SELECTOR,
             vol.Optional("exclude_names", default=""): selector({"text": {"multiline": True}}),
         })
         return self.async_show_form(
@@ -328,6 +336,8 @@ class CentraliteOptionsFlow(config_entries.OptionsFlow):
                 self._base = {
                     "port": chosen,
                     "include_switches": user_input.get("include_switches", base.get("include_switches", False)),
+                    "reconcile": user_input.get("reconcile", base.get("reconcile", True)),
+                    "flush_interval_ms": int(user_input.get("flush_interval_ms", base.get("flush_interval_ms", FLUSH_INTERVAL_MS))),
                     "exclude_names": _parse_exclude(user_input.get("exclude_names", ",".join(base.get("exclude_names", [])))),
                 }
                 return await self.async_step_devices()
@@ -343,6 +353,8 @@ class CentraliteOptionsFlow(config_entries.OptionsFlow):
                 default=current or (options[0]["value"] if options else MANUAL_VALUE),
             ): selector({"select": {"mode": "dropdown", "options": options}}),
             vol.Optional("include_switches", default=base.get("include_switches", False)): selector({"boolean": {}}),
+            vol.Optional("reconcile", default=base.get("reconcile", True)): selector({"boolean": {}}),
+            vol.Optional("flush_interval_ms", default=base.get("flush_interval_ms", FLUSH_INTERVAL_MS)): _FLUSH_SELECTOR,
             vol.Optional("exclude_names", default=", ".join(base.get("exclude_names", []))): selector({"text": {"multiline": True}}),
         })
         return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
@@ -363,6 +375,8 @@ class CentraliteOptionsFlow(config_entries.OptionsFlow):
                     self._base = {
                         "port": port,
                         "include_switches": base.get("include_switches", False),
+                        "reconcile": base.get("reconcile", True),
+                        "flush_interval_ms": base.get("flush_interval_ms", FLUSH_INTERVAL_MS),
                         "exclude_names": base.get("exclude_names", []),
                     }
                     return await self.async_step_devices()
@@ -418,6 +432,7 @@ class CentraliteOptionsFlow(config_entries.OptionsFlow):
                         title="",
                         data={
                             **(self.entry.options or {}),
+                            **getattr(self, "_base", {}),
                             **getattr(self, "_devices", {}),
                             "scenes_map": scenes,
                         },
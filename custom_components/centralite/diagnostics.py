@@ -0,0 +1,42 @@
+"""
+Diagnostics download for a Centralite config entry: options, link metrics and panel state.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+
+from . import DOMAIN
+from .hub import CentraliteHub
+from .pycentralite import iter_bits
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    hub: CentraliteHub | None = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+    result: dict[str, Any] = {
+        "entry": {"data": dict(entry.data), "options": dict(entry.options)},
+    }
+    if hub is None or hub.controller is None:
+        result["controller"] = None
+        return result
+
+    controller = hub.controller
+    state = controller.state
+    result["hub"] = {
+        "include_switches": hub.include_switches,
+        "reconcile": hub.reconcile,
+        "flush_interval": hub.flush_interval,
+        "loads_include": hub.loads_include,
+        "switches_include": hub.switches_include,
+    }
+    result["metrics"] = controller.metrics_snapshot()
+    result["trace"] = controller.trace_dump()  # empty unless centralite.set_trace enabled it
+    result["state"] = {
+        "version": state.version,
+        "loads_on": list(iter_bits(state.load_mask)),
+        "levels": state.load_levels(),
+        "switches_on": list(iter_bits(state.switch_mask)),
+    }
+    return result
@@ -1,19 +1,72 @@
 # custom_components/centralite/hub.py
+import asyncio
 import logging
-from homeassistant.core import HomeAssistant
+import time
+from collections.abc import Awaitable, Callable
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
 from homeassistant.config_entries import ConfigEntryNotReady
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
 from serial import serialutil
-from .pycentralite import Centralite
+from .pycentralite import Centralite, RECONNECT_MAX_DELAY, RECONNECT_MIN_DELAY
 
 _LOGGER = logging.getLogger(__name__)
 
+# Reconciliation poller bounds (seconds). One ^G (+ ^H) per interval; the interval doubles
+# while push traffic keeps arriving and halves when the line is idle or a snapshot fails.
+RECONCILE_MIN_INTERVAL = 30.0
+RECONCILE_INTERVAL = 120.0
+RECONCILE_MAX_INTERVAL = 900.0
+
+# Push-driven state writes are collected and flushed once per tick (ms, options UI)
+FLUSH_INTERVAL_MS = 30
+
+# Link supervision: after this long without inbound bytes, send a heartbeat (^F, 3-byte reply);
+# this many unanswered in a row drops the link. Misses are retried at once, each waiting the
+# controller's adaptive reply timeout, so a dead panel is detected in a second or two.
+HEARTBEAT_INTERVAL = 30.0
+HEARTBEAT_MISSES = 3
+
+# Dispatcher signal sent when the link goes down or comes back; see link_signal
+SIGNAL_LINK = "centralite_link_{}"
+
+
+def link_signal(entry_id: str) -> str:
+    """The link signal for one config entry; the hub sends it, CentraliteLinkEntity listens."""
+    return SIGNAL_LINK.format(entry_id)
+
+
+class CentraliteLinkEntity(Entity):
+    """Base for the panel's entities: unavailable while the serial link is down.
+
+    Subclasses set self.controller and self._entry_id.
+    """
+
+    controller: Centralite
+    _entry_id: str
+
+    @property
+    def available(self) -> bool:
+        return self.controller.connected  # unavailable while the hub reopens the port
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        # Re-evaluate `available` when the serial link drops or comes back
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, link_signal(self._entry_id), self.async_write_ha_state)
+        )
+
+
 class CentraliteHub:
     """Small wrapper that owns the Centralite controller and user-selected config."""
 
-    def __init__(self, hass: HomeAssistant, cfg: dict):
+    def __init__(self, hass: HomeAssistant, cfg: dict, entry_id: str = ""):
         self.hass = hass
+        self.entry_id = entry_id
         self.url = cfg["port"]
         self.include_switches: bool = cfg.get("include_switches", False)
+        self.reconcile: bool = cfg.get("reconcile", True)
+        self.flush_interval: float = cfg.get("flush_interval_ms", FLUSH_INTERVAL_MS) / 1000
 
         # Editable via Options UI
         self.loads_include: list[int] = cfg.get("loads_include") or []
@@ -21,18 +74,234 @@ class CentraliteHub:
         self.scenes_map: dict[str, str] = cfg.get("scenes_map") or {}
 
         self.controller: Centralite | None = None
+        self._reconcile_task: asyncio.Task | None = None
+        self._sweep_task: asyncio.Task | None = None
+        self._sweep_pending: dict[int, None] = {}  # loads queued for the sweep, in order
+        self._supervisor_task: asyncio.Task | None = None
+        self._link_lost = asyncio.Event()
+        self._unsub_link = None
+        # Platform callbacks that add/remove entities to match the current options
+        self._options_listeners: list[Callable[[], Awaitable[None]]] = []
+        self._dirty: dict[Entity, tuple[float | None, float]] = {}  # entity -> (frame received, marked dirty)
+        self._flush_handle: asyncio.TimerHandle | None = None
 
     async def async_setup(self) -> None:
-        def _start():
-            return Centralite(self.url)
+        # asyncio mode: serial I/O runs on the event loop, no reader thread or executor hops
+        controller = Centralite(self.url, loop=self.hass.loop)
         try:
-            self.controller = await self.hass.async_add_executor_job(_start)
+            await controller.async_connect()
         except (serialutil.SerialException, OSError) as e:
             raise ConfigEntryNotReady(f"Serial port not ready: {e}") from e
+        self.controller = controller
+        self._unsub_link = controller.on_link_change(self._async_link_changed)
+        self._supervisor_task = self.hass.async_create_background_task(
+            self._async_supervise(), "centralite link supervisor"
+        )
 
-    async def async_close(self) -> None:
+        if self.reconcile:
+            self._start_reconcile()
+
+    def _start_reconcile(self) -> None:
+        self._reconcile_task = self.hass.async_create_background_task(
+            self._async_reconcile_loop(), "centralite reconcile"
+        )
+
+    @callback
+    def async_add_options_listener(self, listener: Callable[[], Awaitable[None]]) -> Callable[[], None]:
+        """Have a platform re-sync its entities after async_update_options; returns a remover."""
+        self._options_listeners.append(listener)
+        return lambda: self._options_listeners.remove(listener)
+
+    async def async_update_options(self, cfg: dict) -> None:
+        """Apply changed options to the running hub instead of reloading the entry.
+
+        The serial link stays up unless the port changed; then the controller reopens on the
+        new port in place (see _async_supervise). Platforms add and remove only the entities
+        whose loads, switches or scenes were added or dropped.
+        """
+        self.include_switches = cfg.get("include_switches", False)
+        self.flush_interval = cfg.get("flush_interval_ms", FLUSH_INTERVAL_MS) / 1000
+        self.loads_include = cfg.get("loads_include") or []
+        self.switches_include = cfg.get("switches_include") or []
+        self.scenes_map = cfg.get("scenes_map") or {}
+
+        reconcile = cfg.get("reconcile", True)
+        if reconcile != self.reconcile:
+            self.reconcile = reconcile
+            if self._reconcile_task is not None:
+                self._reconcile_task.cancel()
+                self._reconcile_task = None
+            if reconcile:
+                self._start_reconcile()
+
+        if cfg["port"] != self.url:
+            _LOGGER.info("centralite: port changed from %s to %s", self.url, cfg["port"])
+            self.url = cfg["port"]
+            self.controller.change_url(self.url)
+
+        for listener in list(self._options_listeners):
+            await listener()
+
+    @callback
+    def async_schedule_write(self, entity: Entity, received: float | None = None) -> None:
+        """Mark an entity for the next batched state write.
+
+        A scene recall or fade produces a burst of pushes; collecting them means each entity
+        is written at most once per tick, with its latest state. `received` is the push
+        message's receive time; the oldest one pending is kept for latency tracing.
+        """
+        if entity not in self._dirty:
+            self._dirty[entity] = (received, time.monotonic())
+        if self._flush_handle is None:
+            if self.flush_interval <= 0:
+                self._async_flush_writes()
+            else:
+                self._flush_handle = self.hass.loop.call_later(self.flush_interval, self._async_flush_writes)
+
+    @callback
+    def _async_flush_writes(self) -> None:
+        self._flush_handle = None
+        dirty, self._dirty = self._dirty, {}
+        metrics = self.controller.metrics if self.controller else None
+        for entity, (received, marked) in dirty.items():
+            started = time.monotonic()
+            try:
+                entity.async_write_ha_state()
+            except Exception as e:  # not added yet / already removed
+                _LOGGER.debug("centralite: skipped state write for %s: %s", entity, e)
+                continue
+            if metrics is not None:
+                metrics.trace_write(received, marked, started, time.monotonic())
+
+    def async_start_level_sweep(self, load_ids: list[int]) -> None:
+        """Learn real dim levels for loads ^G reported as on, without holding up setup.
+
+        Loads asked for while a sweep is running are queued onto it, not swept instead of it.
+        """
+        if not load_ids:
+            return
+        self._sweep_pending.update(dict.fromkeys(load_ids))
+        if self._sweep_task is None or self._sweep_task.done():
+            self._sweep_task = self.hass.async_create_background_task(
+                self._async_sweep(), "centralite level sweep"
+            )
+
+    async def _async_sweep(self) -> None:
+        while self._sweep_pending:
+            load_ids = list(self._sweep_pending)
+            self._sweep_pending.clear()
+            await self.controller.async_sweep_load_levels(load_ids)
+
+    async def async_start_capture(self, max_bytes: int, backups: int) -> str:
+        """Record raw serial traffic under the HA config dir; returns the capture path."""
+        path = self.hass.config.path(f"centralite_capture_{self.entry_id}.bin")
+        await self.hass.async_add_executor_job(self.controller.start_capture, path, max_bytes, backups)
+        return path
+
+    async def async_stop_capture(self) -> str | None:
+        return await self.hass.async_add_executor_job(self.controller.stop_capture)
+
+    @callback
+    def _async_link_changed(self, connected: bool) -> None:
+        if not connected:
+            self._link_lost.set()
+        async_dispatcher_send(self.hass, link_signal(self.entry_id))  # entities re-evaluate `available`
+
+    async def _async_supervise(self) -> None:
+        """Reopen a lost link in place and resync, so entities only blink unavailable.
+
+        A dead port normally reports itself (connection_lost). A silent one is caught by
+        heartbeats once the line has been quiet for HEARTBEAT_INTERVAL.
+        """
+        ctrl = self.controller
+        misses = 0
+        while True:
+            try:
+                await asyncio.wait_for(self._link_lost.wait(), HEARTBEAT_INTERVAL if not misses else 0)
+            except asyncio.TimeoutError:
+                idle = time.monotonic() - (ctrl.last_rx or ctrl.metrics.started)
+                if misses == 0 and idle < HEARTBEAT_INTERVAL:
+                    continue  # pushes or replies arrived recently; the link is alive
+                if await ctrl.async_heartbeat():
+                    misses = 0
+                    continue
+                misses += 1
+                if misses >= HEARTBEAT_MISSES:
+                    _LOGGER.warning("centralite: %d heartbeats unanswered, reopening %s", misses, self.url)
+                    misses = 0
+                    ctrl.drop_link()
+                continue
+            misses = 0
+
+            self._link_lost.clear()  # a loss right after reconnecting sets it again
+            delay = 0.0  # first retry is immediate; most losses are a blip
+            while True:
+                if delay:
+                    await asyncio.sleep(delay)
+                try:
+                    await ctrl.async_connect()
+                    break
+                except (serialutil.SerialException, OSError) as e:
+                    delay = min(max(delay * 2, RECONNECT_MIN_DELAY), RECONNECT_MAX_DELAY)
+                    _LOGGER.debug("centralite reconnect failed (%s), retrying in %.2fs", e, delay)
+            await self._async_resync()
+
+    async def _async_resync(self) -> None:
+        """One ^G (+ ^H) pass after a reconnect; the controller's diff fires events for what changed."""
         try:
-            if self.controller:
-                self.controller.close()
-        except Exception:
-            pass
+            await self.controller.async_get_all_load_states()
+            if self.include_switches:
+                await self.controller.async_get_all_switch_states()
+        except Exception as e:  # the reconcile poller catches up later
+            _LOGGER.debug("centralite resync failed: %s", e)
+
+    async def _async_reconcile_loop(self) -> None:
+        """Re-read ^G/^H snapshots so a lost ^K frame can't leave HA state wrong for good.
+
+        The controller diffs each snapshot against what it knows and only fires events for
+        loads/switches that actually changed.
+        """
+        ctrl = self.controller
+        interval = RECONCILE_INTERVAL
+        pushes = ctrl.push_count
+        while True:
+            await asyncio.sleep(interval)
+            timeouts = ctrl.query_timeouts
+            try:
+                ok = bool(await ctrl.async_get_all_load_states())
+                if self.include_switches:
+                    ok = bool(await ctrl.async_get_all_switch_states()) and ok
+            except Exception as e:  # keep polling; the next pass may succeed
+                _LOGGER.debug("centralite reconcile failed: %s", e)
+                ok = False
+
+            if not ok or ctrl.query_timeouts > timeouts:
+                interval = RECONCILE_MIN_INTERVAL  # serial trouble: check again soon
+            elif ctrl.push_count > pushes:
+                interval = min(interval * 2, RECONCILE_MAX_INTERVAL)  # pushes are flowing
+            else:
+                interval = max(interval / 2, RECONCILE_MIN_INTERVAL)  # quiet line: verify more often
+            pushes = ctrl.push_count
+            _LOGGER.debug("centralite reconcile: ok=%s, next in %.0fs", ok, interval)
+
+    async def async_close(self) -> None:
+        """Stop the background tasks and close the controller; returns once the port is released."""
+        tasks = [t for t in (self._supervisor_task, self._reconcile_task, self._sweep_task) if t is not None]
+        for task in tasks:
+            task.cancel()
+        self._supervisor_task = self._reconcile_task = self._sweep_task = None
+        self._sweep_pending.clear()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self._unsub_link is not None:
+            self._unsub_link()
+            self._unsub_link = None
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        self._dirty.clear()
+        if self.controller is not None:
+            try:
+                await self.controller.async_close()  # queued commands are still written
+            except Exception as e:
+                _LOGGER.debug("centralite: close failed: %s", e)
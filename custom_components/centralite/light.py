@@ -15,10 +15,10 @@ from homeassistant.components.light import (
     LightEntity,
 )
 from homeassistant.helpers.entity import DeviceInfo 
-from homeassistant.helpers import entity_registry as er
-import re
 
 from . import DOMAIN
+from .codec import LoadLevel
+from .hub import CentraliteHub, CentraliteLinkEntity
 from .pycentralite import Centralite
 
 _LOGGER = logging.getLogger(__name__)
@@ -43,31 +43,6 @@ def _lvl_255_to_99(level_0_255: int) -> int:
         level_0_255 = 255
     return int(round(level_0_255 * 99 / 255))
 
-async def _maybe_migrate_light_unique_ids(hass, entry):
-    reg = er.async_get(hass)
-    for ent in list(reg.entities.values()):
-        # IMPORTANT: migrate ANY centralite light, regardless of config_entry_id
-        if ent.platform != DOMAIN:
-            continue
-
-        # 1) Legacy: elegance.L1 / elegance.L001  ->  {entry_id}.load.001
-        m = re.fullmatch(r"elegance\.L(\d+)", ent.unique_id)
-        if m:
-            chan = int(m.group(1))
-            new_uid = f"{entry.entry_id}.load.{chan:03d}"
-            if ent.unique_id != new_uid:
-                reg.async_update_entity(ent.entity_id, new_unique_id=new_uid)
-            continue
-
-        # 2) Interim/other entries: <anything>.load.<n> -> force current entry_id + padding
-        #    This handles entities tied to an old entry_id or unpadded formats.
-        m = re.fullmatch(r".+\.load\.(\d+)", ent.unique_id)
-        if m:
-            chan = int(m.group(1))
-            new_uid = f"{entry.entry_id}.load.{chan:03d}"
-            if ent.unique_id != new_uid:
-                reg.async_update_entity(ent.entity_id, new_unique_id=new_uid)
-
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -75,33 +50,31 @@ async def async_setup_entry(
     hub = hass.data[DOMAIN][entry.entry_id]
     ctrl: Centralite = hub.controller
 
-    await _maybe_migrate_light_unique_ids(hass, entry)
+    # Seed initial on/off state in one call (^G)
+    await ctrl.async_get_all_load_states()
 
-    # Which loads to expose (user selection from options, or all)
-    all_ids = ctrl.loads()
-    load_ids = hub.loads_include or all_ids
+    entities: dict[int, CentraliteLight] = {}
 
-    # Seed initial on/off state in one call (^G)
-    initial_states: dict[int, bool] = (await hass.async_add_executor_job(ctrl.get_all_load_states)) or {}
+    async def _async_sync() -> None:
+        """Match the entities to the loads to expose (user selection from options, or all)."""
+        load_ids = dict.fromkeys(int(lid) for lid in hub.loads_include or ctrl.loads())
+        for lid in [lid for lid in entities if lid not in load_ids]:
+            await entities.pop(lid).async_remove()
+        added = [lid for lid in load_ids if lid not in entities]
+        for lid in added:
+            entities[lid] = CentraliteLight(entry_id=entry.entry_id, hass=hass, hub=hub, load_id=lid)
 
+        _LOGGER.debug("centralite.light: adding %d light entities", len(added))
+        async_add_entities([entities[lid] for lid in added], False)  # already seeded
 
-    # PASS entry.entry_id into the entity ctor
-    entities = [
-        CentraliteLight(
-            entry_id=entry.entry_id,
-            hass=hass,
-            controller=ctrl,
-            load_id=lid,
-            initially_on=bool(initial_states.get(lid, False)),
-        )
-        for lid in load_ids
-    ]
+        # ^G only says on/off; fetch real brightness for the lights that are on, in the background
+        hub.async_start_level_sweep([lid for lid in added if ctrl.state.load_on(lid)])
 
-    _LOGGER.debug("centralite.light: creating %d light entities", len(entities))
-    async_add_entities(entities, False)  # already seeded
+    await _async_sync()
+    entry.async_on_unload(hub.async_add_options_listener(_async_sync))
 
 
-class CentraliteLight(LightEntity):
+class CentraliteLight(CentraliteLinkEntity, LightEntity):
     """Representation of a single Centralite light."""
 
     _attr_supported_features = SUPPORT_BRIGHTNESS
@@ -111,13 +84,13 @@ class CentraliteLight(LightEntity):
         self,
         entry_id: str,
         hass: HomeAssistant,
-        controller: Centralite,
+        hub: CentraliteHub,
         load_id: int,
-        initially_on: bool | None = None,
     ) -> None:
         self._entry_id = entry_id
         self.hass = hass
-        self.controller = controller
+        self._hub = hub
+        self.controller = controller = hub.controller
         self._id = int(load_id)
 
         # Friendly name and unique_id
@@ -132,14 +105,7 @@ class CentraliteLight(LightEntity):
             model="Elegance / Elite",
         )
 
-        # State
-        if initially_on is not None:
-            self._brightness: int | None = 255 if initially_on else 0
-            self._is_on: bool | None = initially_on
-        else:
-            self._brightness = None
-            self._is_on = None
-
+        # State lives in controller.state (seeded from ^G, kept current by ^K pushes)
         # Subscribe to push updates (^KxxxYY)
         self._unsub = controller.on_load_change(self._id, self._on_load_changed)
 
@@ -148,23 +114,12 @@ class CentraliteLight(LightEntity):
             self._id,
             self._name,
             self._attr_unique_id,
-            initially_on,
+            controller.state.load_on(self._id),
         )
 
-    def _on_load_changed(self, new_level_str: str | None) -> None:
-        """Handle level change from controller (^KxxxYY)."""
-        _LOGGER.debug("Push update for %s: raw level=%s", self._name, new_level_str)
-        if not new_level_str:
-            return
-        try:
-            lvl_0_99 = int(new_level_str)
-        except (TypeError, ValueError):
-            _LOGGER.debug("Invalid level payload for %s: %r", self._name, new_level_str)
-            return
-
-        self._brightness = _lvl_99_to_255(lvl_0_99)
-        self._is_on = (self._brightness or 0) > 0
-        self.schedule_update_ha_state()
+    def _on_load_changed(self, msg: LoadLevel) -> None:
+        """Handle level change from controller (^KxxxYY); controller.state already holds it."""
+        self._hub.async_schedule_write(self, getattr(msg, "received", None))  # batched; handlers run on the event loop
 
     @property
     def name(self) -> str:
@@ -172,11 +127,14 @@ class CentraliteLight(LightEntity):
 
     @property
     def brightness(self) -> int | None:
-        return self._brightness
+        level = self.controller.state.load_level(self._id)
+        if level is None:  # on at a level we haven't learned yet, or never seen
+            return 255 if self.is_on else None
+        return _lvl_99_to_255(level)
 
     @property
     def is_on(self) -> bool | None:
-        return self._is_on
+        return self.controller.state.load_on(self._id)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -187,38 +145,22 @@ class CentraliteLight(LightEntity):
         if ATTR_BRIGHTNESS in kwargs:
             b_255 = int(kwargs[ATTR_BRIGHTNESS])
             b_99 = _lvl_255_to_99(b_255)
-            await self.hass.async_add_executor_job(
-                self.controller.activate_load_at, self._id, b_99, 1
-            )
-            self._brightness = b_255
+            self.controller.activate_load_at(self._id, b_99, 1)
         else:
-            await self.hass.async_add_executor_job(
-                self.controller.activate_load, self._id
-            )
-            self._brightness = 255
-        self._is_on = True
-        self.schedule_update_ha_state()
+            self.controller.activate_load(self._id)
+        self.async_write_ha_state()  # the controller recorded the new level optimistically
 
     async def async_turn_off(self, **kwargs: Any) -> None:
         """Turn off the light."""
-        await self.hass.async_add_executor_job(
-            self.controller.deactivate_load, self._id
-        )
-        self._is_on = False
-        self._brightness = 0
-        self.schedule_update_ha_state()
+        self.controller.deactivate_load(self._id)
+        self.async_write_ha_state()
 
     async def async_update(self) -> None:
-        """Fallback single-light refresh (rarely needed)."""
+        """Fallback single-light refresh (rarely needed); answered from cache unless stale."""
         try:
-            lvl_0_99 = await self.hass.async_add_executor_job(
-                self.controller.get_load_level, self._id
-            )
+            await self.controller.async_get_load_level(self._id)
         except Exception as e:
             _LOGGER.debug("get_load_level failed for %s: %s", self._name, e)
-            return
-        self._brightness = _lvl_99_to_255(lvl_0_99)
-        self._is_on = (self._brightness or 0) > 0
 
     async def async_will_remove_from_hass(self) -> None:
         """Unsubscribe from controller events when entity is removed/reloaded."""
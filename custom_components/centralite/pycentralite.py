@@ -1,93 +1,800 @@
+import asyncio
+import bisect
+import concurrent.futures
 import logging
+import os
+import queue
 import serial
+import struct
 import threading
-import sys  # needed by your exception handler
-
-WAIT_DELAY = 2
+import time
+from array import array
+from collections import deque
+
+from .codec import (
+    ActivateLoad,
+    ActivateScene,
+    DeactivateLoad,
+    DeactivateScene,
+    LevelReply,
+    LoadBitmap,
+    LoadCommand,
+    LoadLevel,
+    PressSwitch,
+    QueryLoadLevel,
+    QueryLoads,
+    QuerySwitches,
+    ReleaseSwitch,
+    SetLoadLevel,
+    SwitchBitmap,
+    SwitchPress,
+    SwitchRelease,
+    Unknown,
+    hex_bitmap,
+    parse_frame,
+)
+
+WAIT_DELAY = 2  # seconds; ceiling for the adaptive reply timeout, used until RTT is measured
+REPLY_TIMEOUT_MIN = 0.25  # floor, so a panel busy with a push burst isn't declared late
 SERIAL_TIMEOUT = 1.0  # seconds, tune as needed
+READ_TIMEOUT = 0.25  # reader/dispatcher poll interval; bounds how long close() waits for the threads
+SHUTDOWN_TIMEOUT = 1.0  # seconds close() waits for each thread (or the transport) to finish
 ENCODING = "utf-8"
 
+# Shared by the threaded reader and the asyncio transport so both open the port the same way
+SERIAL_SETTINGS = {
+    "baudrate": 19200,
+    "parity": serial.PARITY_NONE,
+    "stopbits": serial.STOPBITS_ONE,
+}
+
 _LOGGER = logging.getLogger(__name__)
 
+# Event kinds; subscriptions are keyed by (kind, load/switch number)
+EVENT_LOAD = 0        # ^KxxxYY level change, handler gets the LoadLevel
+EVENT_PRESS = 1       # P0xxx switch pressed, handler gets the SwitchPress
+EVENT_RELEASE = 2     # R0xxx switch released, handler gets the SwitchRelease
+EVENT_LOAD_ON = 3     # on_load_activated (not fired by the panel)
+EVENT_LOAD_OFF = 4    # on_load_deactivated (not fired by the panel)
+
+
+# ---- bitmaps ----------------------------------------------------------------
+# Set-bit positions for every byte value, so walking a bitmap costs one lookup per non-zero byte
+_BIT_POSITIONS = tuple(tuple(b for b in range(8) if v >> b & 1) for v in range(256))
+
+
+def _bitmap_dict(mask, width):
+    bits = format(mask, '0{0}b'.format(width))[::-1] if width else ''
+    return {n: bit == '1' for n, bit in enumerate(bits, 1)}
+
+
+def iter_bits(mask):
+    """Yield the 1-based numbers of the set bits in mask, lowest first."""
+    raw = mask.to_bytes((mask.bit_length() + 7) // 8, 'little')
+    for byte_index, byte in enumerate(raw):
+        if byte:
+            base = byte_index * 8 + 1
+            for bit in _BIT_POSITIONS[byte]:
+                yield base + bit
+
+
+def bitmap_diff(old, new):
+    """(turned_on, turned_off) masks between two bitmaps."""
+    changed = old ^ new
+    return changed & new, changed & old
+
+COMMAND_WINDOW = 0.02  # seconds to collect outgoing commands before one stacked write; 0 writes at once
+STACK_MAX_LEN = 64  # chars per stacked write, kept well inside the controller's input buffer
+
+LEVEL_MAX_AGE = 900.0  # seconds a cached load level is trusted before get_load_level asks the panel again
+
+SWEEP_WINDOW = 4  # ^F queries in flight at once during a background level sweep
+SWEEP_PAUSE = 0.25  # seconds between sweep windows so user commands get the line
+
+LOADS_PER_BOARD = 192  # a ^G reply covers 192 loads; CentraliteState grows past this for extra boards
+
+MAX_FRAME_LEN = 96  # longest frame is the ^H switch bitmap
+CAPTURE_MAX_BYTES = 1 << 20  # per capture file before it rotates
+CAPTURE_BACKUPS = 3  # rotated capture files kept next to the live one (.1 newest)
+CAPTURE_QUEUE_LEN = 4096  # records waiting for the capture writer thread; more are dropped and counted
+RECONNECT_MIN_DELAY = 0.25  # seconds; first retry after a link loss is immediate, then doubles
+RECONNECT_MAX_DELAY = 30.0
+# Link health, see Centralite.link_health
+LINK_UP = 'up'
+LINK_DEGRADED = 'degraded'  # connected, but the last query went unanswered
+LINK_DOWN = 'down'
+LINK_STATES = (LINK_UP, LINK_DEGRADED, LINK_DOWN)
+TRACE_SIZE = 256  # frames/writes kept by the wire trace when it is enabled
+DISPATCH_QUEUE_LEN = 512  # events waiting for handlers; a full ^G/^H diff is at most 576
+READ_GRACE = 0.005  # seconds; lets the rest of a frame land (~10 chars at 19200) before the next read
+
+
+class FrameParser:
+   """Incremental CR-frame splitter shared by the threaded reader and the asyncio protocol.
+
+   Partial frames are kept across reads; anything longer than MAX_FRAME_LEN without a CR
+   is line noise, so it is dropped up to the next CR and parsing resyncs from there.
+   """
+
+   def __init__(self, max_len=MAX_FRAME_LEN):
+        self._buffer = bytearray()
+        self._max_len = max_len
+        self._discarding = False
+        self.discarded = 0  # frames thrown away as garbage
+
+   @property
+   def pending(self) -> bool:
+        """True when a partial frame is waiting for the rest of its bytes."""
+        return bool(self._buffer) or self._discarding
+
+   def feed(self, data) -> list[bytes]:
+        """Add raw bytes; return the complete frames (without CR) now available."""
+        buf = self._buffer
+        buf += data
+        if b'\r' not in data:
+            if len(buf) > self._max_len:
+                self._resync()
+            return []
+
+        parts = buf.split(b'\r')
+        self._buffer = bytearray(parts.pop())  # trailing partial frame, may be empty
+
+        frames = []
+        for part in parts:
+            if self._discarding:  # tail end of an over-long garbage run
+                self._discarding = False
+                continue
+            part = part.strip(b'\n\x00 ')
+            if not part:
+                continue
+            if len(part) > self._max_len:
+                self.discarded += 1
+                continue
+            frames.append(bytes(part))
+        if len(self._buffer) > self._max_len:
+            self._resync()  # after the loop: the complete frames above are good
+        return frames
+
+   def _resync(self):
+        _LOGGER.debug('  Dropping %d bytes without CR, resyncing', len(self._buffer))
+        self._buffer.clear()
+        self._discarding = True
+        self.discarded += 1
+
+
+# ---- wire capture -----------------------------------------------------------
+# File: CAPTURE_MAGIC, then records of <time.monotonic() as double, direction, length> + bytes
+CAPTURE_MAGIC = b'CLCAP1\n'
+CAPTURE_IN = 0  # panel -> host, raw bytes as read (frames may be split across records)
+CAPTURE_OUT = 1  # host -> panel, one stacked write including its CR
+_RECORD = struct.Struct('<dBH')
+
+
+class WireRecorder:
+   """Appends raw serial traffic to a compact binary capture that rotates like a log file.
+
+   `path` is the live file; when it would grow past max_bytes it becomes path.1, older
+   files shift to path.2 ... path.<backups>, and the oldest is deleted. Backups left by an
+   earlier capture are removed when recording starts, so a replay never mixes captures.
+
+   record() only timestamps and queues; a writer thread does the file I/O and rotation,
+   so recording from the asyncio transport never blocks the event loop. The constructor
+   opens the file, so create it off the loop.
+   """
+
+   def __init__(self, path, max_bytes=CAPTURE_MAX_BYTES, backups=CAPTURE_BACKUPS):
+        self.path = os.fspath(path)
+        self._max_bytes = max(max_bytes, 4096)
+        self._backups = backups
+        self._queue = queue.Queue(CAPTURE_QUEUE_LEN)
+        self._file = None
+        self._size = 0
+        self._closed = False
+        self.records = 0
+        self.dropped = 0  # records lost to a full queue (disk slower than the line)
+        for backup in capture_files(self.path):
+            if backup != self.path:
+               os.remove(backup)
+        self._open()
+        self._writer = threading.Thread(target=self._run, name='CentraliteCapture', daemon=True)
+        self._writer.start()
+
+   def _open(self):
+        self._file = open(self.path, 'wb')
+        self._file.write(CAPTURE_MAGIC)
+        self._size = len(CAPTURE_MAGIC)
+
+   def _rotate(self):
+        self._file.close()
+        for n in range(self._backups - 1, 0, -1):
+            src = f'{self.path}.{n}'
+            if os.path.exists(src):
+               os.replace(src, f'{self.path}.{n + 1}')
+        if self._backups > 0:
+            os.replace(self.path, f'{self.path}.1')
+        self._open()
+
+   def record(self, direction, data):
+        if self._closed:
+            return
+        try:
+            self._queue.put_nowait((time.monotonic(), direction, bytes(data)))
+        except queue.Full:
+            self.dropped += 1
+
+   def inbound(self, data):
+        self.record(CAPTURE_IN, data)
+
+   def outbound(self, data):
+        self.record(CAPTURE_OUT, data)
+
+   def _run(self):
+        while True:
+            try:
+               item = self._queue.get(timeout=READ_TIMEOUT)
+            except queue.Empty:
+               if self._closed:  # close() found the queue full and couldn't queue its None
+                  break
+               continue
+            if item is None:
+               break
+            stamp, direction, data = item
+            try:
+               self._write(stamp, direction, data)
+            except OSError as e:
+               _LOGGER.warning('Serial capture to %s failed: %s', self.path, e)
+               self._closed = True  # record() stops queueing
+               while True:  # release what was queued; nobody will write it
+                  try:
+                     self._queue.get_nowait()
+                  except queue.Empty:
+                     break
+               break
+        self._file.close()
+
+   def _write(self, stamp, direction, data):
+        for start in range(0, len(data), 0xFFFF):  # length field is 16 bits
+            chunk = data[start:start + 0xFFFF]
+            if self._size + _RECORD.size + len(chunk) > self._max_bytes:
+               self._rotate()
+            self._file.write(_RECORD.pack(stamp, direction, len(chunk)))
+            self._file.write(chunk)
+            self._size += _RECORD.size + len(chunk)
+            self.records += 1
+
+   def close(self, wait=True):
+        """Stop recording; with wait, return once everything queued is on disk."""
+        if self._closed and not self._writer.is_alive():
+            return
+        self._closed = True
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass  # the writer drains the queue and then notices _closed; never block here
+        if wait:
+            self._writer.join()
+
+
+def read_capture(path):
+   """Yield (monotonic time, direction, bytes) records from one capture file."""
+   with open(path, 'rb') as f:
+        if f.read(len(CAPTURE_MAGIC)) != CAPTURE_MAGIC:
+            raise ValueError(f'{path} is not a Centralite capture')
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+               return  # end of file, or a record cut short by a crash
+            stamp, direction, length = _RECORD.unpack(header)
+            data = f.read(length)
+            if len(data) < length:
+               return
+            yield stamp, direction, data
+
+
+def capture_files(path):
+   """A capture and its rotated backups, oldest first, for replaying in order."""
+   path = os.fspath(path)
+   backups = []
+   n = 1
+   while os.path.exists(f'{path}.{n}'):
+        backups.append(f'{path}.{n}')
+        n += 1
+   return backups[::-1] + ([path] if os.path.exists(path) else [])
+
+
+async def async_replay_capture(controller, paths, speed=1.0):
+   """Feed the inbound side of capture files through a controller's reader and dispatcher.
+
+   Timing between records is kept, divided by speed (0 = as fast as possible). Outbound
+   records are skipped: the replay reproduces what the panel sent, not what we asked for.
+   Returns (frames, seconds).
+   """
+   parser = FrameParser()
+   frames = 0
+   started = time.monotonic()
+   first = None
+   for path in paths:
+        for stamp, direction, data in read_capture(path):
+            if direction != CAPTURE_IN:
+               continue
+            if first is None:
+               first = stamp
+            delay = (stamp - first) / speed - (time.monotonic() - started) if speed > 0 else 0
+            await asyncio.sleep(max(delay, 0))  # one loop turn per recorded read, as data_received gets
+            for frame in parser.feed(data):
+               controller._handle_frame(frame, time.monotonic())
+               frames += 1
+   await asyncio.sleep(0)  # let the dispatcher drain the last batch
+   return frames, time.monotonic() - started
+
+
 class CentraliteThread(threading.Thread):
 
-   def __init__(self, serial, notify_event):
+   def __init__(self, serial, on_frame, reopen=None):
         super().__init__(name='CentraliteThread', daemon=True)
         self._serial = serial
-        self._lastline = None
-        self._recv_event = threading.Event()
-        self._notify_event = notify_event
+        self._on_frame = on_frame
+        self._reopen = reopen  # reopen(exc) -> new port, or None once stopped
+        self._parser = FrameParser()
         self._stop_evt = threading.Event()
+        self.tap = None  # called with raw bytes before parsing (wire capture)
    
    def stop(self):
         self._stop_evt.set()
+        cancel = getattr(self._serial, 'cancel_read', None)  # posix/win32 ports; socket:// times out
+        if cancel is not None:
+            try:
+               cancel()
+            except Exception:
+               pass
 
-   def run(self):
-        while True:
-            line = self._readline()
-            if line is None:
-                continue  # timeout or decode issue; try again
-
-            _LOGGER.debug('In While True, Incoming Line %s', line)
-
-            if len(line) == 5 and (line[0] in ('P', 'R')):
-                _LOGGER.info('  Matches P or R: %s', line)
-                self._notify_event(line)
-
-            elif len(line) == 7 and line.startswith('^K'):
-                _LOGGER.info('  Matches ^K: %s', line)
-                self._notify_event(line)
+   def wait(self, timeout) -> bool:
+        """Sleep up to timeout seconds; True when stop() was called."""
+        return self._stop_evt.wait(timeout)
 
-            elif len(line) == 48:
-                _LOGGER.info('  Matches LOADS 48 hex: %s', line)
+   def run(self):
+        while not self._stop_evt.is_set():
+            try:
+               frames, received = self._read_frames()
+            except Exception as e:  # unplugged adapter, closed socket, driver error
+               if self._stop_evt.is_set() or self._reopen is None:
+                  return
+               self._serial = self._reopen(e)
+               if self._serial is None:
+                  return
+               self._parser = FrameParser()  # a partial frame from the old port is garbage
+               continue
+            for frame in frames:
                 try:
-                  states = Centralite.decode_loads_48hex(line)
-                except Exception as e:
-                  _LOGGER.debug("decode error on ^G frame: %s", e)
-                  continue
-
-                # fire pseudo-^K events so existing light handlers update
-                for load_id, is_on in states.items():
-                  level = "99" if is_on else "00"
-                  self._notify_event(f"^K{load_id:03d}{level}")
-                # fall through to record last line/signal
-
-            elif len(line) == 96:
-                _LOGGER.info('  Matches SWITCHES 96 hex: %s', line)
+                   self._on_frame(frame, received)
+                except Exception:  # one bad frame must never stop the reader
+                   _LOGGER.exception('   Frame %r dropped', frame)
+
+   def _read_frames(self):
+        # Pull everything already buffered by the driver in one read; block (up to
+        # READ_TIMEOUT) for a single byte only when the line is quiet.
+        data = self._serial.read(self._serial.in_waiting or 1)
+        if not data:  # timeout
+            return [], 0.0
+        received = time.monotonic()
+        if self.tap is not None:
+            self.tap(data)
+        frames = self._parser.feed(data)
+        if self._parser.pending:
+            time.sleep(READ_GRACE)  # batch the rest of the frame into the next read
+        return frames, received
+
+
+# ---- wire trace -------------------------------------------------------------
+TRACE_IN = 'in'  # frame from the panel, with its decoded Message
+TRACE_OUT = 'out'  # stacked write to the panel
+TRACE_TIMEOUT = 'timeout'  # query that got no reply within its adaptive timeout
+TRACE_UNSOLICITED = 'unsolicited'  # reply nobody was waiting for
+TRACE_LATE = 'late'  # reply to a query that had already timed out, discarded
+
+
+class WireTrace:
+   """Fixed-size ring of recent traffic, replacing per-frame logging.
+
+   Entries are stored raw, (monotonic time, kind, bytes/str, Message or None), and only
+   formatted when dumped, so tracing costs one deque append per frame or write.
+   """
+
+   def __init__(self, size=TRACE_SIZE):
+        self.entries = deque(maxlen=max(int(size), 1))
+
+   def add(self, kind, raw, decoded=None, stamp=None):
+        self.entries.append((stamp or time.monotonic(), kind, raw, decoded))
+
+   def dump(self) -> list[dict]:
+        """Oldest first; `age_s` is seconds before the dump."""
+        now = time.monotonic()
+        out = []
+        for stamp, kind, raw, decoded in list(self.entries):
+            if isinstance(raw, (bytes, bytearray)):
+               raw = raw.decode(ENCODING, 'replace')
+            out.append({
+               'age_s': round(now - stamp, 3),
+               'kind': kind,
+               'raw': raw.rstrip('\r'),
+               'decoded': repr(decoded) if decoded is not None else None,
+            })
+        return out
+
+
+# ---- metrics ----------------------------------------------------------------
+class Histogram:
+   """Fixed-bucket histogram of milliseconds; one bisect per observation, no allocation."""
+
+   BOUNDS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+   def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS) + 1)  # last bucket is > 5000 ms
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+   def observe(self, ms):
+        self.buckets[bisect.bisect_left(self.BOUNDS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        if ms > self.max:
+            self.max = ms
+
+   def percentile(self, q) -> float | None:
+        """Upper bound of the bucket holding the q-quantile (max when it is past the last bound)."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.BOUNDS, self.buckets):
+            seen += n
+            if seen >= rank:
+               return round(min(bound, self.max), 3)
+        return round(self.max, 3)
+
+   def as_dict(self) -> dict:
+        labels = [f'<={b:g}' for b in self.BOUNDS] + [f'>{self.BOUNDS[-1]:g}']
+        return {
+            'count': self.count,
+            'mean': round(self.total / self.count, 3) if self.count else None,
+            'max': round(self.max, 3),
+            'p50': self.percentile(0.5),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'buckets': dict(zip(labels, self.buckets)),
+        }
+
+
+class RttEstimator:
+   """Smoothed round trip time and variance (RFC 6298 style) and the reply timeout they give.
+
+   Replies that arrive after their query timed out are never sampled, and each timeout
+   doubles the current timeout until a fresh sample brings it back down.
+   """
+
+   ALPHA = 1 / 8
+   BETA = 1 / 4
+
+   def __init__(self, floor=REPLY_TIMEOUT_MIN, ceiling=WAIT_DELAY):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.srtt: float | None = None
+        self.rttvar = 0.0
+        self.timeout = ceiling  # nothing measured yet
+
+   def observe(self, seconds):
+        if self.srtt is None:
+            self.srtt, self.rttvar = seconds, seconds / 2
+        else:
+            self.rttvar += self.BETA * (abs(self.srtt - seconds) - self.rttvar)
+            self.srtt += self.ALPHA * (seconds - self.srtt)
+        self.timeout = min(max(self.srtt + 4 * self.rttvar, self.floor), self.ceiling)
+
+   def backoff(self):
+        self.timeout = min(self.timeout * 2, self.ceiling)
+
+   def as_dict(self) -> dict:
+        return {
+            'srtt_ms': round(self.srtt * 1000, 3) if self.srtt is not None else None,
+            'rttvar_ms': round(self.rttvar * 1000, 3),
+            'timeout_ms': round(self.timeout * 1000, 3),
+        }
+
+
+class CentraliteMetrics:
+   """Counters and latency histograms kept by Centralite; see Centralite.metrics_snapshot."""
+
+   def __init__(self):
+        self.started = time.monotonic()
+        self.bytes_in = 0  # framed bytes, CR included
+        self.bytes_out = 0
+        self.writes = 0  # stacked writes to the port
+        self.writes_dropped = 0  # stacked writes attempted while the link was down
+        self.frames: dict[type, int] = {}  # codec Message type -> count
+        self.handler_errors = 0  # exceptions swallowed in _notify_event
+        self.dispatch_batches = 0
+        self.dispatched = 0  # events handed to handlers
+        self.queue_depth_max = 0  # largest batch the dispatcher found waiting
+        self.rtt = Histogram()  # query written -> reply parsed
+        self.command_delay = Histogram()  # command queued -> written (command window + stacking)
+        self.dispatch = Histogram()  # one dispatcher batch, all handlers
+        # Push latency by stage, frame received -> HA state written (see Centralite.metrics_snapshot)
+        self.trace = {stage: Histogram() for stage in ('parse', 'queue', 'flush_wait', 'state_write', 'total')}
+
+   def trace_dispatch(self, msg, now):
+        """Reader and dispatcher stages of a delivered push message (the first of each batch)."""
+        received = getattr(msg, 'received', None)
+        queued = getattr(msg, 'queued', None)
+        if received is None or queued is None:
+            return
+        trace = self.trace
+        trace['parse'].observe((queued - received) * 1000)
+        trace['queue'].observe((now - queued) * 1000)
+
+   def trace_write(self, received, marked, started, finished):
+        """Entity stages: handler marked it dirty -> batched write started -> state written."""
+        trace = self.trace
+        trace['flush_wait'].observe((started - marked) * 1000)
+        trace['state_write'].observe((finished - started) * 1000)
+        if received is not None:
+            trace['total'].observe((finished - received) * 1000)
+
+
+class DispatchQueue:
+   """Bounded hand-off from the reader (frames -> events) to the dispatcher (events -> handlers).
+
+   The reader never waits on it: a queued ^K event for a load is overwritten in place by a
+   newer one for the same load, so a backed-up dispatcher only delivers the latest level, and
+   when the queue is full further events are dropped and counted. Switch events are never
+   merged. Dropping is safe because Centralite.state is updated before an event is queued;
+   only the handler call is lost, and the reconcile poller re-syncs entities.
+   """
+
+   def __init__(self, maxlen=DISPATCH_QUEUE_LEN):
+        self._items: dict = {}  # key -> (kind, index, msg), in arrival order
+        self._seq = 0
+        self._maxlen = maxlen
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._overflowing = False
+        self.coalesced = 0  # ^K events replaced by a newer one for the same load
+        self.dropped = 0  # events lost to a full queue
+
+   def __len__(self):
+        return len(self._items)
+
+   def put(self, kind, index, msg) -> bool:
+        """Queue an event; True when the queue was empty, i.e. the consumer needs a wake-up."""
+        with self._lock:
+            items = self._items
+            if kind == EVENT_LOAD:
+               key = (kind, index)
+               if key in items:
+                  items[key] = (kind, index, msg)
+                  self.coalesced += 1
+                  return False
             else:
-                _LOGGER.info('  UNRECOGNIZED INPUT, line is %s', line)
+               self._seq += 1
+               key = self._seq
+            if len(items) >= self._maxlen:
+               self.dropped += 1
+               if not self._overflowing:
+                  self._overflowing = True
+                  _LOGGER.warning('Event queue full (%d), dropping events until handlers catch up', self._maxlen)
+               return False
+            items[key] = (kind, index, msg)
+            if len(items) > 1:
+               return False
+        self._ready.set()
+        return True
+
+   def drain(self):
+        """Take every queued event, oldest first."""
+        with self._lock:
+            items, self._items = self._items, {}
+            self._ready.clear()
+            self._overflowing = False
+        return items.values()
+
+   def wait(self, timeout) -> bool:
+        return self._ready.wait(timeout)
+
+   def wake(self):
+        """Release a waiting dispatcher, e.g. so it can see its stop flag."""
+        self._ready.set()
+
+
+class CentraliteDispatcher(threading.Thread):
+   """Threaded mode: runs event handlers off the reader thread so slow handlers can't stall reads."""
+
+   def __init__(self, queue, dispatch):
+        super().__init__(name='CentraliteDispatcher', daemon=True)
+        self._queue = queue
+        self._dispatch = dispatch
+        self._stop_evt = threading.Event()
 
-            # Always store last line & signal
-            self._lastline = line
-            self._recv_event.set()
+   def stop(self):
+        self._stop_evt.set()
+        self._queue.wake()
 
-   def _readline(self):
-        _LOGGER.debug('  Start of _readline')
-        output_bytes = bytearray()
-        while True:
-            b = self._serial.read(size=1)
-            if not b:  # timeout
-                if output_bytes:
-                    break  # return partial (best effort)
-                return None
-            if b[0] == 0x0D:  # CR
-                break
-            output_bytes.extend(b)
-            if len(output_bytes) >= 100:
-                _LOGGER.info('  Broken? OUTPUT IS 100!!!!!!!!!!!!!!!!')
-                break
-        try:
-            s = output_bytes.decode(ENCODING, errors='replace')
-        except Exception as e:
-            _LOGGER.warning("  Decode error in _readline: %s", e)
+   def run(self):
+        while not self._stop_evt.is_set():
+            if self._queue.wait(READ_TIMEOUT) and not self._stop_evt.is_set():
+               self._dispatch()
+
+
+class CentraliteProtocol(asyncio.Protocol):
+   """asyncio counterpart of CentraliteThread; frames arrive as loop callbacks."""
+
+   def __init__(self, on_frame, on_lost=None):
+        self._on_frame = on_frame
+        self._on_lost = on_lost  # on_lost(protocol, exc)
+        self._parser = FrameParser()
+        self.transport = None
+        self.tap = None  # called with raw bytes before parsing (wire capture)
+        self.closed: asyncio.Future | None = None  # resolved by connection_lost
+
+   def connection_made(self, transport):
+        _LOGGER.debug('  Serial transport connected')
+        self.transport = transport
+        self.closed = asyncio.get_running_loop().create_future()
+
+   def data_received(self, data):
+        received = time.monotonic()
+        if self.tap is not None:
+            self.tap(data)
+        for frame in self._parser.feed(data):
+            try:
+               self._on_frame(frame, received)
+            except Exception:  # keep the rest of this read
+               _LOGGER.exception('   Frame %r dropped', frame)
+
+   def connection_lost(self, exc):
+        _LOGGER.debug('  Serial transport lost: %s', exc)
+        self.transport = None
+        if self.closed is not None and not self.closed.done():
+            self.closed.set_result(None)
+        if self._on_lost is not None:
+            self._on_lost(self, exc)
+
+class CentraliteState:
+   """Compact panel state indexed by load/switch number (1-based).
+
+   Load levels (0-99) live in a bytearray and on/off flags in int bitsets, so memory stays
+   flat as boards are added and a snapshot or diff of all loads is a couple of int ops.
+   The reader writes here and entities read from here; every change bumps `version` and,
+   for loads, the per-load counter in `load_versions`.
+   """
+
+   def __init__(self, loads=LOADS_PER_BOARD):
+        self.levels = bytearray(loads + 1)  # index 0 unused
+        self.level_stamps = array('d', bytes(8 * (loads + 1)))  # monotonic time each level was learned
+        self.load_versions = array('L', bytes(array('L').itemsize * (loads + 1)))
+        self.load_mask = 0  # bit n-1: load n on
+        self.level_mask = 0  # bit n-1: levels[n] is a real level (^K, ^F or our own command)
+        self.snapshot_time: float | None = None  # when the last ^G confirmed load_mask
+        self.snapshot_width = 0  # loads covered by that ^G
+        self.switch_mask = 0  # bit n-1: switch n on/pressed
+        self.switch_width = 0  # switches covered by the last ^H, 0 before the first one
+        self.version = 0
+
+   def _grow(self, index):
+        extra = index + 1 - len(self.levels)
+        self.levels.extend(bytes(extra))
+        self.level_stamps.extend(array('d', bytes(8 * extra)))
+        self.load_versions.extend(array('L', bytes(array('L').itemsize * extra)))
+
+   # ---- loads ---------------------------------------------------------------
+   def set_level(self, load, level, now=None) -> bool:
+        """Record a known level; returns True if it differs from what was known."""
+        if load >= len(self.levels):
+            self._grow(load)
+        bit = 1 << (load - 1)
+        changed = (
+            not self.level_mask & bit
+            or self.levels[load] != level
+            or bool(self.load_mask & bit) != bool(level)
+        )
+        self.levels[load] = level
+        self.level_stamps[load] = time.monotonic() if now is None else now
+        self.level_mask |= bit
+        if level:
+            self.load_mask |= bit
+        else:
+            self.load_mask &= ~bit
+        if changed:
+            self.version += 1
+            self.load_versions[load] += 1
+        return changed
+
+   def apply_load_bitmap(self, mask, width, now=None):
+        """Fold a ^G on/off bitmap in; returns (turned_on, turned_off) masks.
+
+        Nothing per load is rewritten: the snapshot time stamps the whole mask and load_level
+        reconciles individual levels against it. Loads that turned on lose their known level.
+        """
+        full = (1 << width) - 1
+        turned_on, turned_off = bitmap_diff(self.load_mask & full, mask)
+        self.load_mask = (self.load_mask & ~full) | mask
+        self.level_mask &= ~turned_on
+        self.snapshot_time = time.monotonic() if now is None else now
+        self.snapshot_width = width
+        if turned_on or turned_off:
+            self.version += 1
+            if width >= len(self.levels):
+               self._grow(width)
+            for load in iter_bits(turned_on | turned_off):
+               self.load_versions[load] += 1
+        return turned_on, turned_off
+
+   def load_on(self, index) -> bool | None:
+        """On/off for a load, None if neither a snapshot nor a level has covered it."""
+        bit = 1 << (index - 1)
+        if index > self.snapshot_width and not self.level_mask & bit:
+            return None
+        return bool(self.load_mask & bit)
+
+   def load_level(self, index, max_age=None) -> int | None:
+        """Level 0-99, or None when unknown or (with max_age) older than max_age seconds."""
+        bit = 1 << (index - 1)
+        known = bool(self.level_mask & bit)
+        stamp = self.level_stamps[index] if known else None
+        if index <= self.snapshot_width and (stamp is None or self.snapshot_time > stamp):
+            stamp = self.snapshot_time  # a newer ^G vouches for off loads and for known on levels
+        elif not known:
+            return None
+        if not self.load_mask & bit:
+            level = 0
+        elif known:
+            level = self.levels[index]
+        else:
+            return None  # on at an unknown level
+        if max_age is not None and time.monotonic() - stamp > max_age:
             return None
-        _LOGGER.debug('  _readline output is: %s', s)
-        return s
+        return level
+
+   def load_levels(self, indexes=None) -> dict[int, int]:
+        """All known levels (or those for indexes), regardless of age."""
+        if indexes is None:
+            indexes = set(iter_bits(self.level_mask))
+            indexes.update(range(1, self.snapshot_width + 1))
+        levels = {}
+        for i in indexes:
+            level = self.load_level(i)
+            if level is not None:
+               levels[i] = level
+        return levels
+
+   # ---- switches ------------------------------------------------------------
+   def set_switch(self, switch, on) -> bool:
+        bit = 1 << (switch - 1)
+        if bool(self.switch_mask & bit) == on:
+            return False
+        self.switch_mask ^= bit
+        self.version += 1
+        return True
+
+   def apply_switch_bitmap(self, mask, width):
+        """Fold a ^H bitmap in; returns (pressed, released) masks, both 0 for the first ^H."""
+        full = (1 << width) - 1
+        if self.switch_width:
+            pressed, released = bitmap_diff(self.switch_mask & full, mask)
+        else:
+            pressed = released = 0
+        self.switch_mask = (self.switch_mask & ~full) | mask
+        self.switch_width = width
+        if pressed or released:
+            self.version += 1
+        return pressed, released
+
+   def switch_on(self, index) -> bool:
+        return bool(self.switch_mask >> (index - 1) & 1)
+
+   def snapshot(self) -> tuple[int, int]:
+        """(load on/off mask, switch mask); diff two with bitmap_diff."""
+        return self.load_mask, self.switch_mask
 
-   def get_response(self):
-      self._recv_event.wait(timeout=WAIT_DELAY)
-      self._recv_event.clear()
-      return self._lastline
 
 class Centralite:
 
@@ -129,40 +836,575 @@ class Centralite:
    
    _LOGGER.info('   In pycentralite.py startup "%s"', ACTIVE_SCENES_DICT)    
 
-   def __init__(self, url):
+   def __init__(
+        self,
+        url,
+        loop: asyncio.AbstractEventLoop | None = None,
+        command_window: float = COMMAND_WINDOW,
+        stack_max_len: int = STACK_MAX_LEN,
+   ):
+        """Threaded mode by default; pass an event loop and await async_connect() for asyncio mode."""
         _LOGGER.info('Start serial setup init using %s', url)
-        self._serial = serial.serial_for_url(
-            url,
-            baudrate=19200,
-            parity=serial.PARITY_NONE,
-            stopbits=serial.STOPBITS_ONE,
-            timeout=SERIAL_TIMEOUT,   # add timeout
+        self._url = url
+        self._loop = loop
+        # Outgoing command queue, see _send
+        self._command_window = command_window
+        self._stack_max_len = stack_max_len
+        self._outbox: list = []  # codec.Command objects
+        self._outbox_loads: dict[int, int] = {}  # load -> outbox slot since the last barrier
+        self._outbox_since = 0.0  # when the oldest queued command was queued
+        self._flush_timer = None
+        self._events: dict[tuple[int, int], tuple[callable, ...]] = {}  # (EVENT_*, id) -> handlers
+        self._events_lock = threading.Lock()
+        self._command_lock = threading.Lock()
+        # Outstanding queries, oldest first: (expected reply Message type, future, time written, timeout)
+        self._pending: deque[tuple[type, asyncio.Future | concurrent.futures.Future, float, float]] = deque()
+        self._pending_lock = threading.Lock()
+        # A timed-out query stays in _pending as a tombstone, (type, None, time written, timeout),
+        # that swallows its late reply: replies carry no load number, so without it a late ^F
+        # answer would be handed to the next ^F query. When a tombstone swallows a reply the
+        # next live query of that type is a suspect (the swallowed reply may have been its
+        # own, the late one lost); a suspect that times out leaves no tombstone.
+        self._suspects: set[tuple] = set()
+        # Reply timing per reply type (a ^H answer is 30x longer than a ^F one), see reply_timeout
+        self._rtt: dict[type, RttEstimator] = {}
+        self._last_reply = 0.0  # when the previous reply arrived; the panel answers one query at a time
+        self._timeouts_in_row = 0
+        # Load levels and switch states, fed by ^K/P/R pushes, ^G/^H snapshots, ^F replies and our own commands
+        self.state = CentraliteState()
+        # Reader -> handler hand-off: threaded mode drains it on a dispatcher thread, asyncio
+        # mode with one loop callback per batch of frames
+        self._dispatch_queue = DispatchQueue()
+        self._dispatcher = None
+        # Link activity, read by the hub's reconciliation poller
+        self.push_count = 0  # ^K/P/R frames received
+        self.last_push_time: float | None = None
+        self.query_timeouts = 0
+        self.metrics = CentraliteMetrics()
+        self._serial = None
+        self._thread = None
+        self._transport = None
+        self._protocol = None
+        self._recorder = None
+        self._trace: WireTrace | None = None  # off by default, see enable_trace
+        # Link supervision, see on_link_change
+        self._link_up = False
+        self._link_handlers: tuple[callable, ...] = ()
+        self._closing = False
+        self.link_losses = 0
+        self.last_rx: float | None = None  # monotonic time of the last inbound frame
+        if loop is None:
+            self._serial = self._open_serial()
+            self._link_up = True
+            self._dispatcher = CentraliteDispatcher(self._dispatch_queue, self._dispatch_events)
+            self._dispatcher.start()
+            self._thread = CentraliteThread(self._serial, self._handle_frame, self._reopen_serial)
+            self._thread.start()
+
+   def _open_serial(self):
+        return serial.serial_for_url(
+            self._url,
+            timeout=READ_TIMEOUT,  # the reader polls its stop flag this often
             write_timeout=SERIAL_TIMEOUT,
+            **SERIAL_SETTINGS,
         )
-        self._events: dict[str, list[callable]] = {}
-        self._command_lock = threading.Lock()
-        self._thread = CentraliteThread(self._serial, self._notify_event)
-        self._thread.start()
+
+   async def async_connect(self):
+        """Open (or reopen after a link loss) the port as an asyncio transport on self._loop.
+
+        Raises SerialException/OSError when the port can't be opened; the hub retries.
+        """
+        import serial_asyncio_fast  # only needed in asyncio mode
+        transport, protocol = await serial_asyncio_fast.create_serial_connection(
+            self._loop, lambda: CentraliteProtocol(self._handle_frame, self._connection_lost),
+            self._url, **SERIAL_SETTINGS
+        )
+        if self._recorder is not None:
+            protocol.tap = self._recorder.inbound
+        self._transport, self._protocol = transport, protocol
+        self._link_changed(True)
+
+   # ---- link supervision -------------------------------------------------
+   @property
+   def connected(self) -> bool:
+        return self._link_up
+
+   @property
+   def link_health(self) -> str:
+        """LINK_UP, LINK_DEGRADED (last query unanswered) or LINK_DOWN (port closed or lost)."""
+        if not self._link_up:
+            return LINK_DOWN
+        return LINK_DEGRADED if self._timeouts_in_row else LINK_UP
+
+   def heartbeat(self) -> bool:
+        """Threaded mode: one cheap query (^F for load 1, 3-byte reply); True when the panel answered."""
+        return self._remember_level(1, self._sendrecv(QueryLoadLevel(1))) is not None
+
+   async def async_heartbeat(self) -> bool:
+        """asyncio-mode heartbeat."""
+        return self._remember_level(1, await self._async_sendrecv(QueryLoadLevel(1))) is not None
+
+   def on_link_change(self, handler):
+        """Call handler(connected) when the link drops or comes back; returns an unsubscribe callable.
+
+        Runs on the event loop in asyncio mode and on the reader thread in threaded mode.
+        """
+        self._link_handlers += (handler,)
+        def unsubscribe():
+            self._link_handlers = tuple(h for h in self._link_handlers if h is not handler)
+        return unsubscribe
+
+   def _link_changed(self, connected, exc=None):
+        if connected == self._link_up:
+            return
+        self._link_up = connected
+        if connected:
+            self._timeouts_in_row = 0
+            _LOGGER.info('Centralite link up on %s', self._url)
+        else:
+            self.link_losses += 1
+            _LOGGER.warning('Centralite link lost on %s: %s', self._url, exc)
+            self._fail_pending()
+        for handler in self._link_handlers:
+            try:
+               handler(connected)
+            except Exception as e:
+               _LOGGER.debug('   Link handler %s failed: %s', handler, e)
+
+   def _fail_pending(self):
+        """Answer every outstanding query with None, as a timeout would, instead of waiting on a dead port."""
+        with self._pending_lock:
+            entries = list(self._pending)
+            self._pending.clear()
+            self._suspects.clear()
+        for entry in entries:
+            if entry[1] is not None and not entry[1].done():
+               entry[1].set_result(None)
+
+   def _connection_lost(self, protocol, exc):
+        if protocol is not self._protocol:
+            return  # an older transport finishing its close
+        self._transport = self._protocol = None
+        if not self._closing:
+            self._link_changed(False, exc)
+
+   @property
+   def url(self) -> str:
+        return self._url
+
+   def change_url(self, url):
+        """Point the controller at another port; an open link is dropped and reopened there by supervision."""
+        if url == self._url:
+            return
+        self._url = url
+        if self._link_up:
+            self.drop_link()
+
+   def drop_link(self):
+        """Close the port because it looks dead (no traffic, probe unanswered); supervision reopens it."""
+        if self._transport is not None:
+            self._transport.close()  # connection_lost reports the loss
+        elif self._serial is not None:
+            try:
+               self._serial.close()  # the reader's next read fails and reopens
+            except Exception:
+               pass
+
+   def _reopen_serial(self, exc):
+        """Reader thread: the port failed; reopen it with backoff until it works or close() is called."""
+        self._link_changed(False, exc)
+        try:
+            self._serial.close()
+        except Exception:
+            pass
+        delay = 0.0
+        while not self._thread.wait(delay):
+            try:
+               port = self._open_serial()
+            except (serial.SerialException, OSError) as e:
+               delay = min(max(delay * 2, RECONNECT_MIN_DELAY), RECONNECT_MAX_DELAY)
+               _LOGGER.debug('   Reopen of %s failed (%s), retrying in %.2fs', self._url, e, delay)
+               continue
+            self._serial = port
+            self._link_changed(True)
+            # Resync off the reader thread, which has to be free to read the replies
+            threading.Thread(target=self.resync, name='CentraliteResync', daemon=True).start()
+            return port
+        return None
+
+   def resync(self, switches=True):
+        """Threaded mode: one ^G (+ ^H) pass; the diff fires events for whatever changed while down."""
+        self.get_all_load_states()
+        if switches:
+            self.get_all_switch_states()
+
+   @property
+   def is_async(self) -> bool:
+        return self._loop is not None
+
+   @property
+   def events_dropped(self) -> int:
+        """Events lost because handlers fell behind (see DispatchQueue)."""
+        return self._dispatch_queue.dropped
+
+   @property
+   def events_coalesced(self) -> int:
+        """^K events superseded by a newer level for the same load before dispatch."""
+        return self._dispatch_queue.coalesced
+
+   def _handle_frame(self, frame, received=None):
+        """Reader stage: parse a frame, update state, resolve replies and queue events for handlers.
+
+        Handlers never run here; see _queue_event. `received` is the reader's time.monotonic()
+        for the read that completed the frame.
+        """
+        msg = parse_frame(frame)
+        kind = type(msg)
+        msg.received = self.last_rx = received = received or time.monotonic()
+        metrics = self.metrics
+        metrics.bytes_in += len(frame) + 1
+        metrics.frames[kind] = metrics.frames.get(kind, 0) + 1
+        if self._trace is not None:
+            self._trace.add(TRACE_IN, frame, msg, received)
+
+        if kind is LoadLevel:
+            self._count_push()
+            self.state.set_level(msg.load, msg.level)
+            self._queue_event(EVENT_LOAD, msg.load, msg)
+            return
+
+        if kind is SwitchPress or kind is SwitchRelease:
+            self._count_push()
+            pressed = kind is SwitchPress
+            self.state.set_switch(msg.switch, pressed)
+            self._queue_event(EVENT_PRESS if pressed else EVENT_RELEASE, msg.switch, msg)
+            return
+
+        if kind is LoadBitmap:
+            # Only loads whose on/off state moved and that somebody listens to get an event;
+            # a load that is still on keeps its real (possibly dimmed) level.
+            turned_on, turned_off = self.state.apply_load_bitmap(msg.mask, msg.width)
+            for load_id in iter_bits(turned_on | turned_off):
+               on = turned_on >> (load_id - 1) & 1
+               event = LoadLevel(load_id, 99 if on else 0)
+               event.received = received
+               self._queue_event(EVENT_LOAD, load_id, event)
+
+        elif kind is SwitchBitmap:
+            # Same diff rule as ^G: a switch that changed behind our back looks like a press/release
+            pressed, released = self.state.apply_switch_bitmap(msg.mask, msg.width)
+            for switch_id in iter_bits(pressed | released):
+               if pressed >> (switch_id - 1) & 1:
+                  event, event_kind = SwitchPress(switch_id), EVENT_PRESS
+               else:
+                  event, event_kind = SwitchRelease(switch_id), EVENT_RELEASE
+               event.received = received
+               self._queue_event(event_kind, switch_id, event)
+
+        elif kind is not LevelReply:
+            return  # unrecognized: counted in metrics, visible in the trace
+
+        self._resolve_reply(msg)
+
+   # ---- wire capture -----------------------------------------------------
+   def start_capture(self, path, max_bytes=CAPTURE_MAX_BYTES, backups=CAPTURE_BACKUPS):
+        """Record raw traffic in both directions to path (rotating); replaces any running capture.
+
+        Opens files, so call it from an executor in asyncio mode.
+        """
+        self.stop_capture()  # finish the running capture first, the new one may reuse its files
+        recorder = self._recorder = WireRecorder(path, max_bytes, backups)
+        reader = self._thread or self._protocol
+        if reader is not None:
+            reader.tap = recorder.inbound
+        _LOGGER.info('Capturing serial traffic to %s', recorder.path)
+
+   def stop_capture(self, wait=True):
+        """Stop recording; returns the capture path, or None when nothing was running.
+
+        With wait (call it from an executor in asyncio mode) it returns once the file is
+        complete; without, the writer thread finishes it in the background.
+        """
+        recorder, self._recorder = self._recorder, None
+        if recorder is None:
+            return None
+        for reader in (self._thread, self._protocol):
+            if reader is not None:
+               reader.tap = None
+        recorder.close(wait)
+        _LOGGER.info('Serial capture stopped: %d records (%d dropped) in %s',
+                     recorder.records, recorder.dropped, recorder.path)
+        return recorder.path
+
+   @property
+   def capturing(self) -> bool:
+        return self._recorder is not None
+
+   # ---- wire trace -------------------------------------------------------
+   def enable_trace(self, size=TRACE_SIZE):
+        """Start (or resize) the in-memory wire trace; keeps the newest entries on resize."""
+        trace = WireTrace(size)
+        if self._trace is not None:
+            trace.entries.extend(self._trace.entries)
+        self._trace = trace
+
+   def disable_trace(self):
+        self._trace = None
+
+   @property
+   def tracing(self) -> bool:
+        return self._trace is not None
+
+   def trace_dump(self) -> list[dict]:
+        """Traced frames/writes, oldest first; empty when tracing is off."""
+        return self._trace.dump() if self._trace is not None else []
+
+   # ---- metrics ----------------------------------------------------------
+   def metrics_snapshot(self) -> dict:
+        """Plain-dict view of the link counters and latency histograms (ms), for diagnostics."""
+        m = self.metrics
+        reader = self._thread or self._protocol
+        frames = {kind.__name__: n for kind, n in m.frames.items()}
+        return {
+            'uptime_s': round(time.monotonic() - m.started, 1),
+            'mode': 'asyncio' if self.is_async else 'threaded',
+            'bytes_in': m.bytes_in,
+            'bytes_out': m.bytes_out,
+            'writes': m.writes,
+            'writes_dropped': m.writes_dropped,
+            'connected': self.connected,
+            'link_health': self.link_health,
+            'link_losses': self.link_losses,
+            'frames_total': sum(frames.values()),
+            'frames': frames,
+            'unrecognized': m.frames.get(Unknown, 0),
+            'discarded': reader._parser.discarded if reader is not None else 0,
+            'push_count': self.push_count,
+            'query_timeouts': self.query_timeouts,
+            'pending_queries': len(self._pending),
+            'handler_errors': m.handler_errors,
+            'dispatched': m.dispatched,
+            'dispatch_batches': m.dispatch_batches,
+            'queue_depth': len(self._dispatch_queue),
+            'queue_depth_max': m.queue_depth_max,
+            'events_coalesced': self.events_coalesced,
+            'events_dropped': self.events_dropped,
+            'capturing': self.capturing,
+            'tracing': self.tracing,
+            'rtt_ms': m.rtt.as_dict(),
+            'reply_timeouts': {kind.__name__: e.as_dict() for kind, e in self._rtt.items()},
+            'command_delay_ms': m.command_delay.as_dict(),
+            'dispatch_ms': m.dispatch.as_dict(),
+            'trace_ms': {stage: h.as_dict() for stage, h in m.trace.items()},
+        }
+
+   def _count_push(self):
+        self.push_count += 1
+        self.last_push_time = time.monotonic()
+
+   def _resolve_reply(self, msg):
+        # The panel answers in order, so the oldest query expecting this reply type owns it;
+        # older queries of other types stay queued until their own reply or timeout.
+        kind = type(msg)
+        now = time.monotonic()
+        with self._pending_lock:
+            for entry in list(self._pending):
+               if entry[0] is not kind:
+                  continue
+               self._pending.remove(entry)
+               if entry[1] is not None:
+                  self._suspects.discard(entry)
+                  break
+               if now - entry[2] < WAIT_DELAY:  # tombstone: this is the timed-out query's late reply
+                  for live in self._pending:
+                     if live[0] is kind and live[1] is not None:
+                        self._suspects.add(live)
+                        break
+                  if self._trace is not None:
+                     self._trace.add(TRACE_LATE, '', msg)
+                  return
+               # a tombstone past WAIT_DELAY: its reply was lost, keep looking
+            else:
+               if self._trace is not None:
+                  self._trace.add(TRACE_UNSOLICITED, '', msg)
+               return
+        self.metrics.rtt.observe((now - entry[2]) * 1000)
+        # Time the panel spent on this query alone: pipelined queries wait for the one ahead
+        self._estimator(kind).observe(now - max(entry[2], self._last_reply))
+        self._last_reply = now
+        self._timeouts_in_row = 0
+        future = entry[1]
+        if not future.done():
+            future.set_result(msg)
+
+   def _write(self, command):
+        if not self._link_up:
+            self.metrics.writes_dropped += 1  # link down; the resync after reconnect shows the real state
+            return
+        data = (command + '\r').encode(ENCODING)
+        if self._recorder is not None:
+            self._recorder.outbound(data)
+        if self._trace is not None:
+            self._trace.add(TRACE_OUT, command)
+        self.metrics.bytes_out += len(data)
+        self.metrics.writes += 1
+        if self._transport is not None:
+            self._transport.write(data)  # non-blocking, must run on the loop
+        else:
+            self._serial.write(data)
 
    def _send(self, command):
+        """Queue a codec.Command; queued commands go out stacked after command_window seconds.
+
+        A later ^A/^B/^E (LoadCommand) for a load replaces the queued one for the same load in place.
+        Any other command is a barrier, so load commands never move across scenes or switch presses.
+        """
+        with self._command_lock:
+            if isinstance(command, LoadCommand):
+               load = command.load
+               slot = self._outbox_loads.get(load)
+               if slot is not None:
+                  self._outbox[slot] = command  # superseded, last write wins
+                  return
+               self._outbox_loads[load] = len(self._outbox)
+            else:
+               self._outbox_loads.clear()
+            if not self._outbox:
+               self._outbox_since = time.monotonic()
+            self._outbox.append(command)
+
+            if self._command_window <= 0:
+               self._flush_locked()
+            elif self._flush_timer is None:
+               if self._loop is not None:
+                  self._flush_timer = self._loop.call_later(self._command_window, self._flush_commands)
+               else:
+                  self._flush_timer = threading.Timer(self._command_window, self._flush_commands)
+                  self._flush_timer.daemon = True
+                  self._flush_timer.start()
+
+   def _flush_commands(self):
         with self._command_lock:
-            if not command.endswith('\r'):
-                command = command + '\r'
-            _LOGGER.info('Send via _send "%s"', command.rstrip())
-            self._serial.write(command.encode(ENCODING))
+            self._flush_locked()
+
+   def _flush_locked(self):
+        """Write the queued commands as few stacked frames as STACK_MAX_LEN allows (lock held)."""
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._outbox:
+            return
+        commands, self._outbox = self._outbox, []
+        self._outbox_loads.clear()
+        self.metrics.command_delay.observe((time.monotonic() - self._outbox_since) * 1000)
+
+        encoded = [c.encode() for c in commands]
+        stacked = encoded[0]
+        for command in encoded[1:]:
+            if len(stacked) + len(command) > self._stack_max_len:
+               self._write(stacked)
+               stacked = command
+            else:
+               stacked += command
+        self._write(stacked)
+
+   def _estimator(self, kind):
+        estimator = self._rtt.get(kind)
+        if estimator is None:
+            estimator = self._rtt[kind] = RttEstimator()
+        return estimator
+
+   def reply_timeout(self, kind) -> float:
+        """Seconds to wait for a reply of Message type kind, from the measured round trips."""
+        return self._estimator(kind).timeout
 
-   def _sendrecv(self, command):
+   def _submit(self, query, future):
+        """Register a reply slot for a query (codec.Command with .reply), then write it. Returns the pending entry.
+
+        The entry's timeout covers the live queries already pending, which the panel answers first;
+        tombstones don't count, and those past WAIT_DELAY (their late reply lost too) are dropped.
+        """
         with self._command_lock:
-            if not command.endswith('\r'):
-                command = command + '\r'
-            _LOGGER.debug('Send via _sendrecv "%s"', command.rstrip())
-            self._serial.write(command.encode(ENCODING))
-            _LOGGER.debug('   Before read')
-        # release lock before waiting for thread signal
-        result = self._thread.get_response()
-        _LOGGER.debug('   Recv "%s"', result)
+            self._flush_locked()  # queued commands go first so the query sees their effect
+            with self._pending_lock:
+               now = time.monotonic()
+               for e in [e for e in self._pending if e[1] is None and now - e[2] >= WAIT_DELAY]:
+                  self._pending.remove(e)
+               timeout = sum(self.reply_timeout(e[0]) for e in self._pending if e[1] is not None)
+               timeout += self.reply_timeout(query.reply)
+               entry = (query.reply, future, now, min(timeout, WAIT_DELAY))
+               self._pending.append(entry)  # before the write, a fast reply must find it
+            self._write(query.encode())
+        return entry
+
+   def _forget(self, entry):
+        with self._pending_lock:
+            try:
+               self._pending.remove(entry)
+            except ValueError:
+               pass
+
+   # ---- load level cache ---------------------------------------------------
+   def cached_load_level(self, index, max_age=LEVEL_MAX_AGE):
+        """Cached level for a load, or None when unknown or older than max_age seconds."""
+        return self.state.load_level(index, max_age)
+
+   def load_levels(self, indexes=None) -> dict[int, int]:
+        """All known levels (or those for indexes), regardless of age; never touches the port."""
+        return self.state.load_levels(indexes)
+
+   def _sendrecv(self, query):
+        """Send a query and block for its reply Message; None on timeout."""
+        results = self._sendrecv_many([query])
+        return results[0]
+
+   def _sendrecv_many(self, queries):
+        """Threaded mode: write several queries back to back and collect the replies in order."""
+        if not self._link_up:
+            return [None] * len(queries)  # nothing would answer
+        entries = [self._submit(q, concurrent.futures.Future()) for q in queries]
+        results = []
+        for entry in entries:
+            try:
+               results.append(entry[1].result(timeout=max(0.0, entry[2] + entry[3] - time.monotonic())))
+            except concurrent.futures.TimeoutError:
+               self._query_timed_out(entry)
+               results.append(None)
+        return results
+
+   async def _async_sendrecv(self, query):
+        """asyncio-mode _sendrecv: write without blocking and await the matching reply; None on timeout."""
+        if not self._link_up:
+            return None
+        entry = self._submit(query, self._loop.create_future())
+        try:
+            result = await asyncio.wait_for(entry[1], entry[3])
+        except asyncio.TimeoutError:
+            self._query_timed_out(entry)
+            result = None
+        finally:
+            self._forget(entry)
         return result
 
+   def _query_timed_out(self, entry):
+        """Count the timeout and leave a tombstone for the late reply (see _suspects)."""
+        with self._pending_lock:
+            try:
+               i = self._pending.index(entry)
+            except ValueError:
+               i = None  # answered or failed meanwhile
+            if entry in self._suspects:
+               self._suspects.discard(entry)
+               if i is not None:
+                  del self._pending[i]  # its reply was most likely the one already swallowed
+            elif i is not None:
+               self._pending[i] = (entry[0], None, entry[2], entry[3])
+        self.query_timeouts += 1
+        self._timeouts_in_row += 1
+        self._estimator(entry[0]).backoff()
+        if self._trace is not None:
+            self._trace.add(TRACE_TIMEOUT, entry[0].__name__)
+
 # Original.  What did I break?
 #def _sendrecv(self, command):
 #      with self._command_lock:
@@ -173,129 +1415,72 @@ class Centralite:
 #         return result
 
 
-   def _add_event(self, event_name, handler):
-      self._events.setdefault(event_name, []).append(handler)
+   def _add_event(self, kind, index, handler):
+      """Subscribe handler to (kind, index); returns an unsubscribe callable.
+
+      Handler lists are immutable tuples replaced wholesale under _events_lock, so the reader
+      can dispatch from whatever tuple it fetched without locking or copying.
+      """
+      key = (kind, int(index))
+      with self._events_lock:
+         self._events[key] = self._events.get(key, ()) + (handler,)
       def unsubscribe():
-         try:
-               self._events[event_name].remove(handler)
-               if not self._events[event_name]:
-                  self._events.pop(event_name, None)
-         except ValueError:
-               pass
+         with self._events_lock:
+            handlers = self._events.get(key, ())
+            if handler not in handlers:
+               return
+            remaining = list(handlers)
+            remaining.remove(handler)
+            if remaining:
+               self._events[key] = tuple(remaining)
+            else:
+               del self._events[key]
       return unsubscribe
 
+   def _queue_event(self, kind, index, msg):
+      # Only subscribed events are queued, so unused loads/switches cost nothing downstream
+      if (kind, index) not in self._events:
+         return
+      msg.queued = time.monotonic()
+      if self._dispatch_queue.put(kind, index, msg) and self._loop is not None:
+         self._loop.call_soon(self._dispatch_events)  # one callback per batch of frames
+
+   def _dispatch_events(self):
+      """Dispatcher stage: deliver everything queued so far."""
+      started = time.perf_counter()
+      batch = self._dispatch_queue.drain()
+      metrics = self.metrics
+      if batch:  # trace once per batch; the first event has waited longest
+         metrics.trace_dispatch(next(iter(batch))[2], time.monotonic())
+      for kind, index, msg in batch:
+         self._notify_event(kind, index, msg)
+      metrics.dispatch.observe((time.perf_counter() - started) * 1000)
+      metrics.dispatch_batches += 1
+      metrics.dispatched += len(batch)
+      if len(batch) > metrics.queue_depth_max:
+         metrics.queue_depth_max = len(batch)
+
+   def _notify_event(self, kind, index, handler_params=""):
+      # There is a handler assigned to each device when it is instantiated
+      # (e.g. light is _on_load_changed, call it with the new light level)
+      handlers = self._events.get((kind, index))
+      if handlers is None:
+         return
+      for handler in handlers:
+         try:
+            handler(handler_params)
+         except Exception as e:  # one broken entity must not stop dispatch for the rest
+            self.metrics.handler_errors += 1
+            _LOGGER.debug('   Handler %s failed for %s %s: %s', handler, kind, index, e)
 
-   def _notify_event(self, event_name):
-      _LOGGER.debug('Event "%s"', event_name)
-      _LOGGER.debug('   Self is "%s"', self)
-      
-      handler_params=""
-      line = str(event_name)
-      # LIGHTS pass in a load level
-      if line[0]=='^' and line[1]=='K': 
-         load = event_name[2:5]
-         level = event_name[5:7]
-         event_name = '^K' + load         
-         _LOGGER.debug('    Updated Event name is: %s', event_name)
-         _LOGGER.debug('    Load %s Level %s', load, level)
-         handler_params=level         
-                     
-      elif line[0]=='P' or line[0]=='R': # Pushed/released Switch
-         _LOGGER.debug('    Switch, command is %s', line)
-         pass  #not currently using this elif
-      
-      
-      # _events.get() calls some HA brains?  Hint: .get() pulls a key off of a dictionary.
-      event_list = self._events.get(event_name, None)
-      _LOGGER.debug('Event list %s', event_list)
-      _LOGGER.debug('   handler_params is %s', handler_params)
-      if event_list is not None:
-         _LOGGER.debug('   Getting handler')
-         for handler in event_list:            
-            # There is a handler assigned to each device when it is instantiated (e.g. light is _on_load_changed, call it with the new light level)
-            _LOGGER.debug('   Before calling handler funct %s ', handler)
-            try:               
-               handler(handler_params)
-            except: #catch all exceptions
-               error_msg = sys.exc_info()[0]
-               _LOGGER.debug('   TRY failed for handler error_msg is %s ', error_msg)               
-      else:
-         _LOGGER.debug('   event_list is NONE, handler not run')
-         pass
-
-   # Written by original coder for eLite, same intent as hex2bin?, I have not evaluated _hex2bits
-   def _hex2bits(self, response, input_first, input_last, output_first):
-      output = {}
-      output_number = output_first
-      for digit in range(input_first, input_last, 2):
-         digit_value = int(response[digit:digit+2], 16)
-         for bit in range(0, 8):
-            bit_value = (digit_value & (1 << bit)) != 0
-            output[output_number] = bit_value
-            output_number += 1
-      return output
- 
-   def _hex2bin_loads(self, response):
-   # response is 48 hex chars, grouped in 6-char chunks (3 bytes)
-      hex2bin_map = {
-         "0":"0000","1":"0001","2":"0010","3":"0011","4":"0100","5":"0101",
-         "6":"0110","7":"0111","8":"1000","9":"1001","A":"1010","B":"1011",
-         "C":"1100","D":"1101","E":"1110","F":"1111",
-      }
-      s = response.upper()
-      i = 0
-      chunks = []
-      while i < len(s):
-         chunks.append(s[i:i+6])  # 3 bytes per chunk
-         i += 6
-
-      reversed_bytes = []
-      for chunk in chunks:
-         nb = ""
-         for j in range(0, len(chunk), 2):
-               nb += chunk[j+1] + chunk[j]  # swap each byte’s nibbles (AB→BA)
-         reversed_bytes.append(nb[::-1])  # reverse byte order for this chunk
-
-      bits = []
-      for rb in reversed_bytes:
-         bits.append("".join(hex2bin_map[x] for x in rb)[::-1])
-      return "".join(bits)
-
-   def _hex2bin_switches(self, response):
-      hex2bin_map = {
-         "0":"0000","1":"0001","2":"0010","3":"0011","4":"0100","5":"0101",
-         "6":"0110","7":"0111","8":"1000","9":"1001","A":"1010","B":"1011",
-         "C":"1100","D":"1101","E":"1110","F":"1111",
-      }
-      s = response.upper()
-      i = 0
-      chunks = []
-      while i < len(s):
-         chunks.append(s[i:i+4])  # 2 bytes per chunk
-         i += 4
-
-      reversed_bytes = []
-      for chunk in chunks:
-         nb = ""
-         for j in range(0, len(chunk), 2):
-               nb += chunk[j+1] + chunk[j]
-         reversed_bytes.append(nb[::-1])
-
-      bits = []
-      for rb in reversed_bytes:
-         bits.append("".join(hex2bin_map[x] for x in rb)[::-1])
-      return "".join(bits)
-
-
-       
    def on_load_activated(self, index, handler):
-      self._add_event('N{0:03d}'.format(index), handler)
+      return self._add_event(EVENT_LOAD_ON, index, handler)
 
    def on_load_deactivated(self, index, handler):
-      self._add_event('F{0:03d}'.format(index), handler)
+      return self._add_event(EVENT_LOAD_OFF, index, handler)
 
    def on_load_change(self, index, handler):
-      self._add_event('^K{0:03d}'.format(index), handler)
+      return self._add_event(EVENT_LOAD, index, handler)
 
    def on_switch_pressed(self, index, handler):
       # This is called when switch.py adds all the switch devices.  When else could it run?  - cw
@@ -303,19 +1488,21 @@ class Centralite:
       _LOGGER.debug('   IN on_switch_pressed, handler is "%s"', handler)
       
       # NOTE! Centralite uses a 0 for a single board system here, format is P0 and then the 3 digit switch #
-      self._add_event('P{0:04d}'.format(index), handler)
+      return self._add_event(EVENT_PRESS, index, handler)
 
    def on_switch_released(self, index, handler):
       # NOTE! Centralite uses a 0 for a single board system here, format is P0 and then the switch # for a single board system
       _LOGGER.debug('IN on_switch_released, index is "%s"', index)
       _LOGGER.debug('   IN on_switch_released, handler is "%s"', handler)      
-      self._add_event('R{0:04d}'.format(index), handler)
+      return self._add_event(EVENT_RELEASE, index, handler)
 
    def activate_load(self, index):
-      self._send('^A{0:03d}'.format(index))
+      self._send(ActivateLoad(index))
+      self.state.set_level(index, 99)
 
    def deactivate_load(self, index):
-      self._send('^B{0:03d}'.format(index))
+      self._send(DeactivateLoad(index))
+      self.state.set_level(index, 0)
 
    def activate_scene(self, index, scene_name):
       # HA can't do an on/off on a single scene, so each Centralite scene has two HA scenes (one for off, one for on)
@@ -323,19 +1510,75 @@ class Centralite:
       _LOGGER.debug('IN pycentralite.py activate_scene, scene_name is "%s"', scene_name)
       index=int(index)
       if "-ON" in scene_name.upper():
-        self._send('^C{0:03d}'.format(index))
+        self._send(ActivateScene(index))
       elif "-OFF" in scene_name.upper():
-        self._send('^D{0:03d}'.format(index))        
+        self._send(DeactivateScene(index))
 
    # unused, HA does not support OFF for a scene
    #def deactivate_scene(self, index):
    #   self._send('^D{0:03d}'.format(index))
 
    def activate_load_at(self, index, level, rate):
-      self._send('^E{0:03d}{1:02d}{2:02d}'.format(index, level, rate))
-
-   def get_load_level(self, index):
-      return int(self._sendrecv('^F{0:03d}'.format(index)))
+      self._send(SetLoadLevel(index, level, rate))
+      self.state.set_level(index, level)
+
+   def get_load_level(self, index, max_age=LEVEL_MAX_AGE):
+      """Load level 0-99 from the cache, asking the panel (^F) only when it is unknown or stale."""
+      level = self.cached_load_level(index, max_age)
+      if level is None:
+         level = self._remember_level(index, self._sendrecv(QueryLoadLevel(index)))
+      return level
+
+   async def async_get_load_level(self, index, max_age=LEVEL_MAX_AGE):
+      level = self.cached_load_level(index, max_age)
+      if level is None:
+         level = self._remember_level(index, await self._async_sendrecv(QueryLoadLevel(index)))
+      return level
+
+   def get_load_levels(self, indexes, max_age=LEVEL_MAX_AGE) -> dict[int, int | None]:
+      """Levels for several loads; stale ones are re-queried with pipelined ^F (all written before the first reply is awaited)."""
+      levels = {i: self.cached_load_level(i, max_age) for i in indexes}
+      stale = [i for i, level in levels.items() if level is None]
+      if stale:
+         replies = self._sendrecv_many([QueryLoadLevel(i) for i in stale])
+         for i, resp in zip(stale, replies):
+            levels[i] = self._remember_level(i, resp)
+      return levels
+
+   async def async_get_load_levels(self, indexes, max_age=LEVEL_MAX_AGE) -> dict[int, int | None]:
+      """asyncio-mode get_load_levels."""
+      levels = {i: self.cached_load_level(i, max_age) for i in indexes}
+      stale = [i for i, level in levels.items() if level is None]
+      if stale:
+         replies = await asyncio.gather(*(self._async_sendrecv(QueryLoadLevel(i)) for i in stale))
+         for i, resp in zip(stale, replies):
+            levels[i] = self._remember_level(i, resp)
+      return levels
+
+   async def async_sweep_load_levels(self, indexes, window=SWEEP_WINDOW, pause=SWEEP_PAUSE):
+      """Background refinement of loads whose level is unknown (e.g. on in ^G but never seen in ^K).
+
+      Queries go out `window` at a time, pipelined, with `pause` seconds between windows and
+      never while user commands are waiting to be written. Changed levels fire ^K events.
+      """
+      todo = [i for i in indexes if self.cached_load_level(i) is None]
+      _LOGGER.debug('   Level sweep for %d loads', len(todo))
+      for start in range(0, len(todo), window):
+         while self._outbox:
+            await asyncio.sleep(self._command_window)
+         batch = [i for i in todo[start:start + window] if self.cached_load_level(i) is None]
+         replies = await asyncio.gather(*(self._async_sendrecv(QueryLoadLevel(i)) for i in batch))
+         for index, reply in zip(batch, replies):
+            self._remember_level(index, reply)
+         await asyncio.sleep(pause)
+
+   def _remember_level(self, index, reply):
+      """Store a ^F reply's level; a change fires a ^K event, as a push would. Returns the level or None."""
+      if reply is None:
+         return None
+      if self.state.set_level(index, reply.level):
+         self._queue_event(EVENT_LOAD, index, LoadLevel(index, reply.level))
+      return reply.level
 
    # ^G: Get instant on/off status of all loads on this board
    # ^H: Get instant on/off status of all switches on this board.
@@ -367,29 +1610,36 @@ class Centralite:
    def get_all_load_states(self) -> dict[int, bool]:
       """Send ^G and return {load#: on/off}."""
       _LOGGER.debug("   IN get_all_load_states")
-      resp = self._sendrecv('^G')
-      try:
-         states = self.decode_loads_48hex(resp)
-      except Exception as e:
-         _LOGGER.debug("decode_loads_48hex failed: %s (resp=%r)", e, resp)
+      return self._load_states_from(self._sendrecv(QueryLoads()))
+
+   async def async_get_all_load_states(self) -> dict[int, bool]:
+      """asyncio-mode get_all_load_states."""
+      return self._load_states_from(await self._async_sendrecv(QueryLoads()))
+
+   def _load_states_from(self, reply) -> dict[int, bool]:
+      if reply is None:
+         _LOGGER.debug("no ^G reply within %.2fs", self.reply_timeout(LoadBitmap))
          return {}
-      _LOGGER.debug("   load states decoded for %d loads", len(states))
-      return states
+      return _bitmap_dict(reply.mask, reply.width)
 
    def get_all_switch_states(self) -> dict[int, bool]:
         """Send ^H and return {switch#: on/off} (LED/logic state per manual)."""
         _LOGGER.debug("   IN get_all_switch_states")
-        resp = self._sendrecv('^H')
-        try:
-            states = self.decode_switches_96hex(resp)
-        except Exception as e:
-            _LOGGER.debug("decode_switches_96hex failed: %s (resp=%r)", e, resp)
+        return self._switch_states_from(self._sendrecv(QuerySwitches()))
+
+   async def async_get_all_switch_states(self) -> dict[int, bool]:
+        """asyncio-mode get_all_switch_states."""
+        return self._switch_states_from(await self._async_sendrecv(QuerySwitches()))
+
+   def _switch_states_from(self, reply) -> dict[int, bool]:
+        if reply is None:
+            _LOGGER.debug("no ^H reply within %.2fs", self.reply_timeout(SwitchBitmap))
             return {}
-        _LOGGER.debug("   switch states decoded for %d switches", len(states))
-        return states
+        return _bitmap_dict(reply.mask, reply.width)
 
 
    def press_switch(self, index):
+      self.state.set_switch(index, True)  # optimistic; the panel's P frame should follow
       # THIS IS NOT FULLY TESTED BUT IT DOES SEND THE COMMANDS but I didn't see any activity in real life from it
       
       # only sending a press ^I makes Centralite think a user is holding down the button causing a dim rather than an on/off
@@ -407,17 +1657,18 @@ class Centralite:
       
       # A button press without a release causes, dimming right?  This isn't doing anything anymore in testing. 
       # I have no use case for it so I'm leaving code as is.
-      self._send('^I{0:03d}'.format(index))   #! old, single command that hung my button      
-      self._send('^J{0:03d}'.format(index))
+      self._send(PressSwitch(index))   #! old, single command that hung my button      
+      self._send(ReleaseSwitch(index))
       return
 
    def release_switch(self, index):
+      self.state.set_switch(index, False)
       _LOGGER.debug('   IN release_switch, index is "%s"', index)
       # HA never needs to press and hold a button, in my opinion. 
       # Centralite uses a press-and-hold for dimming. In HA we can dimm by just setting the target load level.  
       # Therefore, a release is really a simulation of a physical press/release combination.
-      self._send('^I{0:03d}'.format(index))
-      self._send('^J{0:03d}'.format(index))
+      self._send(PressSwitch(index))
+      self._send(ReleaseSwitch(index))
 
    # friendly_name defined in YAML
    def get_switch_name(self, index):
@@ -437,26 +1688,77 @@ class Centralite:
    def scenes(self):
       return(Centralite.ACTIVE_SCENES_DICT)
    
-   def close(self):
-      """Cleanly close serial and stop thread (if stop flag exists)."""
+   def close(self, flush=True):
+      """Stop reading, answer outstanding queries with None and close the port.
+
+      Commands still waiting for their command window are written first when flush is
+      True, dropped otherwise. Threaded mode joins the reader and dispatcher (up to
+      SHUTDOWN_TIMEOUT each); asyncio mode only starts closing the transport, so use
+      async_close to wait for it. Calling close again does nothing.
+      """
+      if self._closing:
+         return
       try:
-         # If you add stop() on the thread, call it here.
-         if hasattr(self._thread, "stop"):
-            self._thread.stop()
-      except Exception:
-         pass
+         if flush:
+            self._flush_commands()  # don't drop commands still waiting for their window
+         else:
+            self._drop_commands()
+      except Exception as e:
+         _LOGGER.debug('   Final flush failed: %s', e)
+      self._closing = True
+      self._link_up = False  # later writes and queries are dropped, nothing is reported
+      self.stop_capture(wait=not self.is_async)  # no file I/O on the event loop
+      self._fail_pending()
+      if self._transport is not None:
+         self._transport.close()
+         self._transport = None
+         return
+      for thread in (self._thread, self._dispatcher):
+         if thread is not None:
+            thread.stop()
+      for thread in (self._thread, self._dispatcher):
+         if thread is not None and thread is not threading.current_thread():
+            thread.join(SHUTDOWN_TIMEOUT)
+            if thread.is_alive():
+               _LOGGER.warning('%s did not stop within %ss', thread.name, SHUTDOWN_TIMEOUT)
+      if self._serial is not None:
+         try:
+            self._serial.close()
+         except Exception:
+            pass
+
+   async def async_close(self, flush=True):
+      """asyncio-mode close that returns once the transport has let go of the port."""
+      protocol = self._protocol
+      self.close(flush)
+      if protocol is None or protocol.closed is None:
+         return
       try:
-         self._serial.close()
-      except Exception:
-         pass
-
+         await asyncio.wait_for(asyncio.shield(protocol.closed), SHUTDOWN_TIMEOUT)
+      except asyncio.TimeoutError:
+         _LOGGER.warning('Serial transport did not close within %ss', SHUTDOWN_TIMEOUT)
+
+   def _drop_commands(self):
+      with self._command_lock:
+         if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+         if self._outbox:
+            _LOGGER.debug('   Dropping %d queued commands', len(self._outbox))
+         self._outbox = []
+         self._outbox_loads.clear()
+
+
+   # ---- ASCII-hex -> bitmaps (per manual), see codec.hex_bitmap ------------
+   @staticmethod
+   def decode_loads_bitmap(response: str) -> tuple[int, int]:
+        """Decode a ^G reply (48 hex, any multiple of 6) into (mask, number of loads)."""
+        return hex_bitmap(response, 6)
 
-   # ---- ASCII-hex -> boolean maps (per manual) -----------------------------
    @staticmethod
-   def _bits_from_byte(byte_val: int):
-        """Yield 8 booleans LSB->MSB (bit0..bit7)."""
-        for bit in range(8):
-            yield bool((byte_val >> bit) & 0x01)
+   def decode_switches_bitmap(response: str) -> tuple[int, int]:
+        """Decode a ^H reply (96 hex, any multiple of 4) into (mask, number of switches)."""
+        return hex_bitmap(response, 4)
 
    @staticmethod
    def decode_loads_48hex(response: str) -> dict[int, bool]:
@@ -466,38 +1768,7 @@ class Centralite:
         Chunks map sequentially: loads 1..24, 25..48, etc.
         Returns { load_number(1-based): on(bool) }.
         """
-        if not response:
-            return {}
-        s = response.strip().upper()
-        if len(s) % 6 != 0:
-            # be tolerant; ignore trailing partial
-            s = s[: len(s) // 6 * 6]
-
-        result: dict[int, bool] = {}
-        load_base = 0  # 0, 24, 48, ...
-
-        for off in range(0, len(s), 6):
-            chunk = s[off : off + 6]
-            # bytes: least-significant, middle, most-significant
-            b0 = int(chunk[0:2], 16)  # loads 1..8   (relative)
-            b1 = int(chunk[2:4], 16)  # loads 9..16
-            b2 = int(chunk[4:6], 16)  # loads 17..24
-
-            # Map 3 bytes -> 24 loads
-            idx = load_base + 1  # convert to 1-based
-            for bitval in Centralite._bits_from_byte(b0):  # 8 bits -> loads 1..8
-                result[idx] = bitval
-                idx += 1
-            for bitval in Centralite._bits_from_byte(b1):  # 9..16
-                result[idx] = bitval
-                idx += 1
-            for bitval in Centralite._bits_from_byte(b2):  # 17..24
-                result[idx] = bitval
-                idx += 1
-
-            load_base += 24
-
-        return result
+        return _bitmap_dict(*hex_bitmap(response, 6))
 
    @staticmethod
    def decode_switches_96hex(response: str) -> dict[int, bool]:
@@ -507,30 +1778,4 @@ class Centralite:
         Chunks map sequentially: switches 1..16, 17..32, etc.
         Returns { switch_number(1-based): on(bool) }.
         """
-        if not response:
-            return {}
-        s = response.strip().upper()
-        if len(s) % 4 != 0:
-            s = s[: len(s) // 4 * 4]
-
-        result: dict[int, bool] = {}
-        sw_base = 0  # 0, 16, 32, ...
-
-        for off in range(0, len(s), 4):
-            chunk = s[off : off + 4]
-            # bytes: least-significant, most-significant
-            b0 = int(chunk[0:2], 16)  # switches 1..8 (relative)
-            b1 = int(chunk[2:4], 16)  # switches 9..16
-
-            idx = sw_base + 1
-            for bitval in Centralite._bits_from_byte(b0):  # 1..8
-                result[idx] = bitval
-                idx += 1
-            for bitval in Centralite._bits_from_byte(b1):  # 9..16
-                result[idx] = bitval
-                idx += 1
-
-            sw_base += 16
-
-        return result
-   
\ No newline at end of file
+        return _bitmap_dict(*hex_bitmap(response, 4))
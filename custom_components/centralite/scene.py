@@ -12,11 +12,11 @@ from homeassistant.core import HomeAssistant, callback
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.components.scene import Scene
-from homeassistant.helpers import entity_registry as er
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.util import slugify
 
 from . import DOMAIN
+from .hub import CentraliteLinkEntity
 from .pycentralite import Centralite
 
 _LOGGER = logging.getLogger(__name__)
@@ -29,75 +29,50 @@ async def async_setup_entry(
 ) -> None:
     hub = hass.data[DOMAIN][entry.entry_id]
     ctrl: Centralite = hub.controller
-    scenes: dict[str, str] = hub.scenes_map or ctrl.scenes()  # { "12": "Goodnight", ... }
-
-    # Build desired entities keyed by scene name (stable) not number
-    desired: list[tuple[str, str, str]] = []  # (suffix, key, friendly_name_with_suffix)
-    for sid_raw, base_name in scenes.items():
-        key = slugify(base_name) or f"scene_{int(sid_raw)}"  # fallback
-        desired.append(("ON", key, f"{base_name}-ON"))
-        desired.append(("OFF", key, f"{base_name}-OFF"))
-
-    # Migrate old numeric unique_ids -> name-keyed unique_ids (one time)
-    await _maybe_migrate_scene_unique_ids(hass, entry, scenes)
 
     # Helper to lookup current number by key (latest options)
     @callback
     def sid_lookup(scene_key: str) -> str | None:
         # current map from options/controller
-        current = (hass.data[DOMAIN][entry.entry_id].scenes_map or ctrl.scenes())
+        current = (hub.scenes_map or ctrl.scenes())
         # invert: name -> sid (normalize names)
         inv = {slugify(v): str(int(k)) for k, v in current.items()}
         return inv.get(scene_key)
 
-    # De-dupe and add
-    seen_uids: set[str] = set()
-    entities: list[CentraliteScene] = []
-    for suffix, key, friendly in desired:
-        uid = f"{entry.entry_id}.scene.{key}.{suffix}"
-        if uid in seen_uids:
-            continue
-        seen_uids.add(uid)
-        entities.append(
-            CentraliteScene(
+    entities: dict[str, CentraliteScene] = {}  # unique_id -> entity
+
+    async def _async_sync() -> None:
+        """Match the entities to the scenes map; a renumbered scene keeps its entity."""
+        scenes: dict[str, str] = hub.scenes_map or ctrl.scenes()  # { "12": "Goodnight", ... }
+
+        # Build desired entities keyed by scene name (stable) not number, de-duped
+        desired: dict[str, tuple[str, str]] = {}  # unique_id -> (key, friendly_name_with_suffix)
+        for sid_raw, base_name in scenes.items():
+            key = slugify(base_name) or f"scene_{int(sid_raw)}"  # fallback
+            for suffix in ("ON", "OFF"):
+                desired.setdefault(f"{entry.entry_id}.scene.{key}.{suffix}", (key, f"{base_name}-{suffix}"))
+
+        for uid in [uid for uid, ent in entities.items() if desired.get(uid, (None, None))[1] != ent.name]:
+            await entities.pop(uid).async_remove()  # dropped, or renamed to the same key
+        added = [uid for uid in desired if uid not in entities]
+        for uid in added:
+            key, friendly = desired[uid]
+            entities[uid] = CentraliteScene(
                 entry_id=entry.entry_id,
                 controller=ctrl,
                 scene_key=key,
                 friendly_name=friendly,
                 sid_lookup=sid_lookup,
             )
-        )
-
-    _LOGGER.debug("centralite.scene: creating %d scene entities", len(entities))
-    async_add_entities(entities, False)
 
+        _LOGGER.debug("centralite.scene: adding %d scene entities", len(added))
+        async_add_entities([entities[uid] for uid in added], False)
 
-async def _maybe_migrate_scene_unique_ids(hass, entry, scenes_map):
-    reg = er.async_get(hass)
-    sid_to_key = {str(int(sid)): slugify(name) for sid, name in (scenes_map or {}).items()}
-    for ent in list(reg.entities.values()):
-        if ent.config_entry_id != entry.entry_id or ent.platform != DOMAIN:
-            continue
+    await _async_sync()
+    entry.async_on_unload(hub.async_add_options_listener(_async_sync))
 
-        m = re.fullmatch(rf"{re.escape(entry.entry_id)}\.scene\.(\d+)\.(ON|OFF)", ent.unique_id)
-        if not m:
-            m = re.fullmatch(r"elegance\.scene(\d+)(ON|OFF)", ent.unique_id)
-        if not m:
-            m = re.fullmatch(r"elegance\.scene(\d+)\.(ON|OFF)", ent.unique_id)
-        if not m:
-            continue  # << guard
 
-        sid, suffix = str(int(m.group(1))), m.group(2)
-        key = sid_to_key.get(sid)
-        if not key:
-            continue  # scene id was removed/renamed; leave it orphaned by design
-        new_uid = f"{entry.entry_id}.scene.{key}.{suffix}"
-        if ent.unique_id != new_uid:
-            reg.async_update_entity(ent.entity_id, new_unique_id=new_uid)
-
-
-
-class CentraliteScene(Scene):
+class CentraliteScene(CentraliteLinkEntity, Scene):
     """A Centralite scene (ON/OFF) keyed by scene name; number can change in options."""
 
     _attr_should_poll = False
@@ -146,6 +121,4 @@ class CentraliteScene(Scene):
         if not sid:
             _LOGGER.warning("Scene %s has no current id; skipping", self._name)
             return
-        await self.hass.async_add_executor_job(
-            self.controller.activate_scene, sid, self._name
-        )
+        self.controller.activate_scene(sid, self._name)
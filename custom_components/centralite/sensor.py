@@ -0,0 +1,183 @@
+"""
+Diagnostic sensors for the Centralite link (Config Entry version).
+
+All of them are disabled by default; enable the ones you need on the
+"Centralite Controller" device. Values come from Centralite.metrics_snapshot().
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.helpers.entity import DeviceInfo
+
+from . import DOMAIN
+from .hub import CentraliteHub
+from .pycentralite import LINK_STATES
+
+_LOGGER = logging.getLogger(__name__)
+
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class CentraliteSensorDescription(SensorEntityDescription):
+    value_fn: Callable[[dict], Any]
+    rate: bool = False  # report the per-second change of value_fn between updates
+
+
+SENSORS: tuple[CentraliteSensorDescription, ...] = (
+    CentraliteSensorDescription(
+        key="link_health",
+        name="Link health",
+        device_class=SensorDeviceClass.ENUM,
+        options=list(LINK_STATES),
+        value_fn=lambda m: m["link_health"],
+    ),
+    CentraliteSensorDescription(
+        key="frame_rate",
+        name="Frames received",
+        native_unit_of_measurement="frames/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m["frames_total"],
+        rate=True,
+    ),
+    CentraliteSensorDescription(
+        key="push_rate",
+        name="Push events",
+        native_unit_of_measurement="events/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m["push_count"],
+        rate=True,
+    ),
+    CentraliteSensorDescription(
+        key="bytes_in",
+        name="Bytes received",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m["bytes_in"],
+    ),
+    CentraliteSensorDescription(
+        key="bytes_out",
+        name="Bytes sent",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m["bytes_out"],
+    ),
+    CentraliteSensorDescription(
+        key="rtt_p95",
+        name="Query round trip p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m["rtt_ms"]["p95"],
+    ),
+    CentraliteSensorDescription(
+        key="reply_timeout",
+        name="Level query timeout",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m["reply_timeouts"].get("LevelReply", {}).get("timeout_ms"),
+    ),
+    CentraliteSensorDescription(
+        key="command_delay_p95",
+        name="Command delay p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m["command_delay_ms"]["p95"],
+    ),
+    CentraliteSensorDescription(
+        key="dispatch_p95",
+        name="Dispatch time p95",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m["dispatch_ms"]["p95"],
+    ),
+    CentraliteSensorDescription(
+        key="query_timeouts",
+        name="Query timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m["query_timeouts"],
+    ),
+    CentraliteSensorDescription(
+        key="unrecognized",
+        name="Unrecognized frames",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m["unrecognized"] + m["discarded"],
+    ),
+    CentraliteSensorDescription(
+        key="handler_errors",
+        name="Handler errors",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m["handler_errors"],
+    ),
+    CentraliteSensorDescription(
+        key="events_dropped",
+        name="Events dropped",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda m: m["events_dropped"],
+    ),
+    CentraliteSensorDescription(
+        key="queue_depth_max",
+        name="Event queue peak",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda m: m["queue_depth_max"],
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    hub: CentraliteHub = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(
+        [CentraliteMetricSensor(entry.entry_id, hub, description) for description in SENSORS],
+        update_before_add=True,
+    )
+
+
+class CentraliteMetricSensor(SensorEntity):
+    """One link metric, polled from the controller."""
+
+    entity_description: CentraliteSensorDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_should_poll = True
+
+    def __init__(self, entry_id: str, hub: CentraliteHub, description: CentraliteSensorDescription) -> None:
+        self.entity_description = description
+        self._hub = hub
+        self._attr_unique_id = f"{entry_id}.metrics.{description.key}"
+        self._attr_name = f"Centralite {description.name}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, entry_id)},
+            name="Centralite Controller",
+            manufacturer="Centralite",
+            model="Elegance / Elite",
+        )
+        self._last: tuple[float, float] | None = None  # (monotonic time, counter) for rate sensors
+
+    async def async_update(self) -> None:
+        controller = self._hub.controller
+        if controller is None:
+            return
+        value = self.entity_description.value_fn(controller.metrics_snapshot())
+        if not self.entity_description.rate:
+            self._attr_native_value = value
+            return
+        now = time.monotonic()
+        if self._last is not None and now > self._last[0] and value >= self._last[1]:
+            self._attr_native_value = round((value - self._last[1]) / (now - self._last[0]), 2)
+        self._last = (now, value)
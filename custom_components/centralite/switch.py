@@ -11,49 +11,16 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.helpers.entity import DeviceInfo
-from homeassistant.helpers import entity_registry as er
-import re
 
 from . import DOMAIN
+from .codec import SwitchPress, SwitchRelease
+from .hub import CentraliteHub, CentraliteLinkEntity
 from .pycentralite import Centralite
 
 _LOGGER = logging.getLogger(__name__)
 
 ATTR_NUMBER = "number"
 
-async def _maybe_migrate_switch_unique_ids(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """
-    Migrate legacy switch unique_ids to the stable, padded format:
-      legacy:  "elegance.SW075" or "elegance.SW75"
-      interim: "{entry_id}.switch.SW75"
-      final:   "{entry_id}.switch.SW075"
-    """
-    reg = er.async_get(hass)
-
-    for ent in list(reg.entities.values()):
-        if ent.config_entry_id != entry.entry_id or ent.platform != DOMAIN:
-            continue
-
-        # Legacy elegance.* → padded
-        m = re.fullmatch(r"elegance\.SW0*(\d+)", ent.unique_id)
-        if m:
-            sw = int(m.group(1))
-            new_uid = f"{entry.entry_id}.switch.SW{sw:03d}"
-            if ent.unique_id != new_uid:
-                reg.async_update_entity(ent.entity_id, new_unique_id=new_uid)
-            continue
-
-        # Interim new (un-padded) → padded
-        m = re.fullmatch(rf"{re.escape(entry.entry_id)}\.switch\.SW0*(\d+)", ent.unique_id)
-        if m:
-            sw = int(m.group(1))
-            new_uid = f"{entry.entry_id}.switch.SW{sw:03d}"
-            if ent.unique_id != new_uid:
-                reg.async_update_entity(ent.entity_id, new_unique_id=new_uid)
-
-
-
-
 async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
 ) -> None:
@@ -61,44 +28,38 @@ async def async_setup_entry(
     hub = hass.data[DOMAIN][entry.entry_id]
     ctrl: Centralite = hub.controller
 
-    await _maybe_migrate_switch_unique_ids(hass, entry)
+    entities: dict[int, CentraliteSwitch] = {}
+
+    async def _async_sync() -> None:
+        """Match the entities to the switches to expose (none unless include_switches)."""
+        if hub.include_switches:
+            switch_ids = dict.fromkeys(int(sid) for sid in hub.switches_include or ctrl.button_switches())
+        else:
+            switch_ids = {}
+        for sid in [sid for sid in entities if sid not in switch_ids]:
+            await entities.pop(sid).async_remove()
+        added = [sid for sid in switch_ids if sid not in entities]
+        if not added:
+            return
+
+        # Seed switch states in one call (^H); entities read them from ctrl.state
+        await ctrl.async_get_all_switch_states()
+        for sid in added:
+            entities[sid] = CentraliteSwitch(entry_id=entry.entry_id, hub=hub, switch_id=sid)
+
+        _LOGGER.debug("centralite.switch: adding %d switch entities", len(added))
+        async_add_entities([entities[sid] for sid in added], False)
 
     if not hub.include_switches:
         _LOGGER.warning(
             "centralite.switch: include_switches is False; skipping creation. "
             "Enable it in Settings → Devices & Services → Centralite → Configure."
         )
-        return
-
-    all_ids = ctrl.button_switches()
-    switch_ids = hub.switches_include or all_ids
-
-    initial_states: dict[int, bool] = (
-        await hass.async_add_executor_job(ctrl.get_all_switch_states)
-    ) or {}
-
-    seen: set[str] = set()
-    entities: list[CentraliteSwitch] = []
-    for sid in switch_ids:
-        name = ctrl.get_switch_name(sid)  # e.g., "SW075"
-        uid = f"{entry.entry_id}.switch.{name}"
-        if uid in seen:
-            continue
-        seen.add(uid)
-        entities.append(
-            CentraliteSwitch(
-                entry_id=entry.entry_id,
-                controller=ctrl,
-                switch_id=int(sid),
-                initially_on=bool(initial_states.get(int(sid), False)),
-            )
-        )
-
-    _LOGGER.debug("centralite.switch: creating %d switch entities", len(entities))
-    async_add_entities(entities, False)
+    await _async_sync()
+    entry.async_on_unload(hub.async_add_options_listener(_async_sync))
 
 
-class CentraliteSwitch(SwitchEntity):
+class CentraliteSwitch(CentraliteLinkEntity, SwitchEntity):
     """Representation of a single Centralite switch (momentary: pressed/released)."""
 
     _attr_should_poll = False  # push-driven via P/R events
@@ -106,19 +67,17 @@ class CentraliteSwitch(SwitchEntity):
     def __init__(
         self,
         entry_id: str,
-        controller: Centralite,
+        hub: CentraliteHub,
         switch_id: int,
-        initially_on: bool = False,
     ) -> None:
         self._entry_id = entry_id
-        self.controller = controller
+        self._hub = hub
+        self.controller = controller = hub.controller
         self._id = int(switch_id)
         self._name = controller.get_switch_name(self._id)  # e.g. "SW075"
         self._attr_unique_id = f"{self._entry_id}.switch.{self._name}"
 
-        # pressed=True, released=False
-        self._state: bool = bool(initially_on)
-
+        # pressed=True, released=False; lives in controller.state
         # Group under one device card
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, self._entry_id)},
@@ -136,17 +95,15 @@ class CentraliteSwitch(SwitchEntity):
             self._id,
             self._name,
             self._attr_unique_id,
-            initially_on,
+            controller.state.switch_on(self._id),
         )
 
     # ---------- Event handlers ----------
-    def _on_switch_pressed(self, *_: Any) -> None:
-        self._state = True
-        self.schedule_update_ha_state()
+    def _on_switch_pressed(self, msg: SwitchPress) -> None:
+        self._hub.async_schedule_write(self, getattr(msg, "received", None))  # batched; controller.state is already updated
 
-    def _on_switch_released(self, *_: Any) -> None:
-        self._state = False
-        self.schedule_update_ha_state()
+    def _on_switch_released(self, msg: SwitchRelease) -> None:
+        self._hub.async_schedule_write(self, getattr(msg, "received", None))
 
     # ---------- HA properties ----------
     @property
@@ -155,7 +112,7 @@ class CentraliteSwitch(SwitchEntity):
 
     @property
     def is_on(self) -> bool:
-        return self._state
+        return self.controller.state.switch_on(self._id)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -163,15 +120,13 @@ class CentraliteSwitch(SwitchEntity):
 
     # ---------- Commands (simulate press/release) ----------
     async def async_turn_on(self, **_: Any) -> None:
-        await self.hass.async_add_executor_job(self.controller.press_switch, self._id)
-        # Optimistic; physical P event should follow
-        self._state = True
-        self.schedule_update_ha_state()
+        self.controller.press_switch(self._id)
+        # Optimistic (the controller records it); physical P event should follow
+        self.async_write_ha_state()
 
     async def async_turn_off(self, **_: Any) -> None:
-        await self.hass.async_add_executor_job(self.controller.release_switch, self._id)
-        self._state = False
-        self.schedule_update_ha_state()
+        self.controller.release_switch(self._id)
+        self.async_write_ha_state()
 
     async def async_will_remove_from_hass(self) -> None:
         """Unsubscribe from controller events on unload/reload."""
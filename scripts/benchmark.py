@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the Centralite protocol hot paths.
+
+Runs without Home Assistant or hardware: the integration modules are loaded
+straight from custom_components/centralite without executing its __init__.py.
+
+    python scripts/benchmark.py                 # print timings
+    python scripts/benchmark.py --save          # record them as the baseline
+    python scripts/benchmark.py --check         # exit 1 if any case regressed
+    python scripts/benchmark.py -k dispatch     # only cases whose name contains "dispatch"
+
+Baselines live in scripts/benchmark_baseline.json. Every case is also stored
+relative to a pure-Python calibration loop timed in the same run, and --check
+compares those ratios, so CPU frequency and machine load mostly cancel out.
+A case only counts as regressed when it is both THRESHOLD and FLOOR_US slower.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import json
+import platform
+import statistics
+import sys
+import timeit
+import types
+from pathlib import Path
+
+COMPONENT = Path(__file__).resolve().parents[1] / "custom_components" / "centralite"
+BASELINE = Path(__file__).resolve().with_name("benchmark_baseline.json")
+THRESHOLD = 0.5  # --check fails when a case is 50% slower than its baseline: catches step changes, not drift
+FLOOR_US = 0.25  # ... and slower by at least this much: sub-microsecond cases swing by more than 50%
+MIN_RUN_TIME = 0.02  # seconds per timing run; shorter runs are mostly timer and scheduler noise
+_PKG = "centralite_bench"
+
+
+def load(module: str):
+    """Import custom_components/centralite/<module>.py as part of a bare package."""
+    if _PKG not in sys.modules:
+        pkg = types.ModuleType(_PKG)
+        pkg.__path__ = [str(COMPONENT)]
+        sys.modules[_PKG] = pkg
+    return importlib.import_module(f"{_PKG}.{module}")
+
+
+def bench(fn, number: int = 20000, repeat: int = 11) -> float:
+    """Median time per call over repeat runs, in microseconds.
+
+    number is doubled until one run takes MIN_RUN_TIME, so tiny cases are timed over enough
+    calls; the median, unlike the best run, doesn't hinge on one lucky or unlucky run.
+    """
+    timer = timeit.Timer(fn)
+    while timer.timeit(number) < MIN_RUN_TIME:
+        number *= 2
+    return statistics.median(timer.repeat(number=number, repeat=repeat)) / number * 1e6
+
+
+# Each case builder returns {name: (callable, starting number of calls per timing run)}
+def codec_cases() -> dict:
+    codec = load("codec")
+    loads = ("03" + "00" * 10 + "ff" * 13).encode()
+    switches = ("a5" * 48).encode()
+    set_level = codec.SetLoadLevel(12, 55, 1)
+    stack = [codec.SetLoadLevel(i, 50, 1) for i in range(1, 9)] + [codec.ActivateScene(4)]
+    return {
+        "parse ^K": (lambda: codec.parse_frame(b"^K01255"), 5000),
+        "parse P": (lambda: codec.parse_frame(b"P0075"), 5000),
+        "parse ^F reply": (lambda: codec.parse_frame(b"042"), 5000),
+        "parse ^G 48 hex": (lambda: codec.parse_frame(loads), 5000),
+        "parse ^H 96 hex": (lambda: codec.parse_frame(switches), 5000),
+        "parse unknown": (lambda: codec.parse_frame(b"?garbage"), 5000),
+        "encode ^E": (set_level.encode, 5000),
+        "encode stack of 9": (lambda: "".join(c.encode() for c in stack), 5000),
+    }
+
+
+def framing_cases() -> dict:
+    pc = load("pycentralite")
+    burst = b"".join(b"^K%03d%02d\r" % (i, i % 100) for i in range(1, 65))  # a scene recall
+    split = [burst[i:i + 7] for i in range(0, len(burst), 7)]  # same bytes, ragged reads
+    parser = pc.FrameParser()
+
+    def ragged():
+        for chunk in split:
+            parser.feed(chunk)
+
+    return {
+        "frame 64 x ^K, one read": (lambda: parser.feed(burst), 500),
+        "frame 64 x ^K, 7-byte reads": (ragged, 500),
+    }
+
+
+def bitmap_cases() -> dict:
+    pc = load("pycentralite")
+    loads = "03" + "00" * 10 + "ff" * 13
+    switches = "a5" * 48
+    state = pc.CentraliteState()
+    masks = [int("5" * 48, 16), int("a" * 48, 16)]  # every load flips each call
+
+    def diff():
+        masks.reverse()
+        state.apply_load_bitmap(masks[0], 192)
+
+    return {
+        "decode_loads_48hex": (lambda: pc.Centralite.decode_loads_48hex(loads), 2000),
+        "decode_switches_96hex": (lambda: pc.Centralite.decode_switches_96hex(switches), 1000),
+        "decode_loads_bitmap": (lambda: pc.Centralite.decode_loads_bitmap(loads), 5000),
+        "diff ^G snapshot, 192 flips": (diff, 2000),
+    }
+
+
+def _run_callbacks(loop) -> None:
+    """Run what is already scheduled on loop (the dispatcher's call_soon), then return."""
+    loop.call_soon(loop.stop)
+    loop.run_forever()
+
+
+def dispatch_cases() -> dict:
+    pc = load("pycentralite")
+    loop = asyncio.new_event_loop()  # asyncio mode without connecting: no port, no threads
+    cases = {}
+    for subscribers in (75, 192):
+        ctrl = pc.Centralite("loop://", loop=loop)
+        for load_id in range(1, subscribers + 1):
+            ctrl.on_load_change(load_id, lambda msg: None)
+        snapshots = [("55" * 24).encode(), ("aa" * 24).encode()]
+
+        def push(ctrl=ctrl):
+            ctrl._handle_frame(b"^K00142")
+            _run_callbacks(loop)
+
+        def snapshot(ctrl=ctrl, snapshots=snapshots):
+            snapshots.reverse()
+            ctrl._handle_frame(snapshots[0])  # flips every load -> one event per subscriber
+            _run_callbacks(loop)
+
+        cases[f"dispatch ^K, {subscribers} subscribed"] = (push, 5000)
+        cases[f"dispatch ^G flip, {subscribers} subscribed"] = (snapshot, 200)
+    return cases
+
+
+CASES = (codec_cases, framing_cases, bitmap_cases, dispatch_cases)
+
+
+def _calibration() -> int:
+    total = 0
+    for i in range(200):
+        total += i * i
+    return total
+
+
+def run(pattern: str = "") -> tuple[dict[str, float], float]:
+    """(microseconds per case, calibration microseconds); the calibration is timed between cases."""
+    results, calibration = {}, []
+    for builder in CASES:
+        for name, (fn, number) in builder().items():
+            if pattern in name:
+                calibration.append(bench(_calibration, 500))
+                results[name] = bench(fn, number)
+    return results, statistics.median(calibration) if calibration else 1.0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-k", dest="pattern", default="", help="only run cases containing this text")
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE.name}")
+    parser.add_argument("--check", action="store_true", help="compare against the baseline, exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="allowed slowdown for --check (0.5 = 50%%)")
+    args = parser.parse_args(argv)
+
+    recorded = json.loads(BASELINE.read_text()) if BASELINE.exists() else {}
+    baseline = recorded.get("relative", {})
+    results, calibration = run(args.pattern)
+    relative = {name: us / calibration for name, us in results.items()}
+
+    regressed = []
+    for name, us in results.items():
+        line = f"{name:<34} {us:10.3f} us"
+        base = baseline.get(name)
+        if base:
+            change = relative[name] / base - 1
+            line += f"   {change:+7.1%} vs baseline"
+            if change > args.threshold and us - base * calibration > FLOOR_US:
+                regressed.append(name)
+                line += "  REGRESSED"
+        print(line)
+
+    if args.save:
+        BASELINE.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "calibration_us": round(calibration, 3),
+            "results": {**recorded.get("results", {}), **{n: round(us, 3) for n, us in results.items()}},
+            "relative": {**baseline, **{n: round(r, 4) for n, r in relative.items()}},
+        }, indent=2) + "\n")
+        print(f"baseline written to {BASELINE}")
+
+    if args.check:
+        if not baseline:
+            print(f"no baseline at {BASELINE}; run with --save first")
+            return 1
+        if regressed:
+            print(f"{len(regressed)} case(s) more than {args.threshold:.0%} (and {FLOOR_US} us) slower than baseline")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+Centralite Elegance panel emulator on a TCP socket.
+
+Speaks the serial protocol the integration uses, so anything that opens ports
+with serial.serial_for_url can point at socket://HOST:PORT instead of a panel:
+
+    ^Axxx / ^Bxxx      load on / off           -> ^Kxxx99 / ^Kxxx00
+    ^ExxxLLRR          load to level LL        -> ^KxxxLL
+    ^Cxxx / ^Dxxx      scene on / off          -> one ^K per load in the scene
+    ^Fxxx              level query             -> nnn
+    ^G / ^H            load / switch bitmaps   -> 48 / 96 hex
+    ^Ixxx / ^Jxxx      switch press / release  -> P0xxx / R0xxx
+
+Both directions are paced like the real 19200 baud 8N1 line (~0.52 ms per
+byte); --no-pacing turns that off. Background traffic (scene floods, button
+presses) can be generated for load testing:
+
+    python scripts/emulator.py --port 7000 --scene-rate 2 --press-rate 5
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import random
+import re
+
+BAUD = 19200
+BYTE_TIME = 10 / BAUD  # start + 8 data + stop bits
+LOADS = 192
+SWITCHES = 384
+SCENE_SIZE = 16  # loads per emulated scene
+CHUNK = 64  # bytes written per paced burst (~33 ms of line time)
+
+_COMMAND = re.compile(rb"\^(?:([ABCDFIJ])(\d{3})|E(\d{3})(\d{2})(\d{2})|([GH]))")
+
+_LOGGER = logging.getLogger("centralite.emulator")
+
+
+def default_scenes(count: int = 32, size: int = SCENE_SIZE, loads: int = LOADS) -> dict[int, list[int]]:
+    """Scene n drives `size` consecutive loads starting at load 8(n-1)+1, wrapping at `loads`."""
+    return {n: [(8 * (n - 1) + k) % loads + 1 for k in range(size)] for n in range(1, count + 1)}
+
+
+class _Client:
+    """One connected host; outbound frames are queued and paced onto its socket."""
+
+    def __init__(self, writer: asyncio.StreamWriter, byte_time: float) -> None:
+        self.writer = writer
+        self._byte_time = byte_time
+        self._queue: asyncio.Queue[bytes] = asyncio.Queue()
+        self._pump = asyncio.create_task(self._run())
+
+    def send(self, frame: bytes) -> None:
+        self._queue.put_nowait(frame)
+
+    async def _run(self) -> None:
+        while True:
+            data = await self._queue.get()
+            while len(data) < CHUNK and not self._queue.empty():
+                data += self._queue.get_nowait()
+            if self._byte_time:
+                await asyncio.sleep(len(data) * self._byte_time)  # the last byte lands after the line time
+            self.writer.write(data)
+            await self.writer.drain()
+
+    def close(self) -> None:
+        self._pump.cancel()
+        self.writer.close()
+
+
+class PanelEmulator:
+    """Emulated panel state plus a TCP server; start() returns the bound (host, port)."""
+
+    def __init__(
+        self,
+        loads: int = LOADS,
+        switches: int = SWITCHES,
+        scenes: dict[int, list[int]] | None = None,
+        pacing: bool = True,
+        response_delay: float = 0.0,
+    ) -> None:
+        self.levels = bytearray(loads + 1)  # 1-based, 0-99
+        self.switches = bytearray(switches + 1)
+        self.scenes = scenes if scenes is not None else default_scenes(loads=loads)
+        self.byte_time = BYTE_TIME if pacing else 0.0
+        self.response_delay = response_delay  # panel "think time" before answering a command
+        self.stats = {"commands": 0, "unknown": 0, "frames": 0, "load_frames": 0, "bytes": 0}
+        self._clients: set[_Client] = set()
+        self._handlers: set[asyncio.Task] = set()
+        self._server: asyncio.base_events.Server | None = None
+
+    # ---- server ---------------------------------------------------------------
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[str, int]:
+        self._server = await asyncio.start_server(self._serve, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        for client in list(self._clients):
+            client.close()
+        self._clients.clear()
+        if self._handlers:  # closed sockets end the handlers with EOF; don't leave them to be cancelled
+            await asyncio.wait(self._handlers, timeout=1.0)
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def disconnect(self) -> None:
+        """Drop every connected host, as a pulled cable or rebooted serial server would."""
+        for client in list(self._clients):
+            client.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client(writer, self.byte_time)
+        self._clients.add(client)
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        _LOGGER.info("host connected: %s", writer.get_extra_info("peername"))
+        try:
+            while True:
+                line = await reader.readuntil(b"\r")
+                if self.byte_time:
+                    await asyncio.sleep(len(line) * self.byte_time)  # inbound line time
+                if self.response_delay:
+                    await asyncio.sleep(self.response_delay)
+                self._execute(line[:-1], client)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._clients.discard(client)
+            self._handlers.discard(task)
+            client.close()
+            _LOGGER.info("host disconnected")
+
+    # ---- protocol -------------------------------------------------------------
+    def _execute(self, line: bytes, client: _Client) -> None:
+        """Run one CR-terminated line, which may hold several stacked commands."""
+        pos = 0
+        for match in _COMMAND.finditer(line):
+            if match.start() != pos:
+                self.stats["unknown"] += 1
+            pos = match.end()
+            self.stats["commands"] += 1
+            op, index, e_load, e_level, _rate, query = match.groups()
+            if e_load:
+                self.set_level(int(e_load), int(e_level))
+            elif query == b"G":
+                self._reply(client, self.load_bitmap())
+            elif query == b"H":
+                self._reply(client, self.switch_bitmap())
+            else:
+                n = int(index)
+                if op == b"A":
+                    self.set_level(n, 99)
+                elif op == b"B":
+                    self.set_level(n, 0)
+                elif op == b"C":
+                    self.recall_scene(n, True)
+                elif op == b"D":
+                    self.recall_scene(n, False)
+                elif op == b"F":
+                    self._reply(client, b"%03d" % self._level(n))
+                elif op == b"I":
+                    self.press(n)
+                elif op == b"J":
+                    self.release(n)
+        if pos != len(line):
+            self.stats["unknown"] += 1
+
+    def _level(self, load: int) -> int:
+        return self.levels[load] if 0 < load < len(self.levels) else 0
+
+    def _reply(self, client: _Client, frame: bytes) -> None:
+        self._count(frame)
+        client.send(frame + b"\r")
+
+    def broadcast(self, frame: bytes) -> None:
+        """Send an unsolicited frame to every connected host."""
+        for client in self._clients:
+            self._count(frame)
+            client.send(frame + b"\r")
+
+    def _count(self, frame: bytes) -> None:
+        self.stats["frames"] += 1
+        self.stats["bytes"] += len(frame) + 1
+        if frame[:2] == b"^K":
+            self.stats["load_frames"] += 1
+
+    def set_level(self, load: int, level: int) -> None:
+        if 0 < load < len(self.levels):
+            self.levels[load] = min(level, 99)
+            self.broadcast(b"^K%03d%02d" % (load, self.levels[load]))
+
+    def recall_scene(self, scene: int, on: bool = True) -> None:
+        for load in self.scenes.get(scene, ()):
+            self.set_level(load, 99 if on else 0)
+
+    def press(self, switch: int) -> None:
+        if 0 < switch < len(self.switches):
+            self.switches[switch] = 1
+        self.broadcast(b"P0%03d" % switch)
+
+    def release(self, switch: int) -> None:
+        if 0 < switch < len(self.switches):
+            self.switches[switch] = 0
+        self.broadcast(b"R0%03d" % switch)
+
+    @staticmethod
+    def _bitmap(flags, width: int) -> bytes:
+        mask = sum(1 << (n - 1) for n in range(1, len(flags)) if flags[n])
+        return mask.to_bytes(width // 8, "little").hex().upper().encode()
+
+    def load_bitmap(self) -> bytes:
+        return self._bitmap(self.levels, LOADS)
+
+    def switch_bitmap(self) -> bytes:
+        return self._bitmap(self.switches, SWITCHES)
+
+    # ---- background traffic ---------------------------------------------------
+    async def traffic(self, scene_rate: float = 0.0, press_rate: float = 0.0, seed: int | None = None) -> None:
+        """Recall scenes and press buttons at the given average rates (per second) until cancelled."""
+        rng = random.Random(seed)
+        tasks = []
+        if scene_rate > 0:
+            tasks.append(self._every(scene_rate, rng, lambda: self.recall_scene(
+                rng.choice(list(self.scenes)), rng.random() < 0.5)))
+        if press_rate > 0:
+            def press_release():
+                switch = rng.randint(1, len(self.switches) - 1)
+                self.press(switch)
+                self.release(switch)
+            tasks.append(self._every(press_rate, rng, press_release))
+        if tasks:
+            await asyncio.gather(*tasks)
+
+    @staticmethod
+    async def _every(rate: float, rng: random.Random, action) -> None:
+        while True:
+            await asyncio.sleep(rng.expovariate(rate))
+            action()
+
+
+async def _main(args: argparse.Namespace) -> None:
+    panel = PanelEmulator(pacing=not args.no_pacing, response_delay=args.response_delay / 1000)
+    host, port = await panel.start(args.host, args.port)
+    print(f"Centralite emulator on socket://{host}:{port}")
+    try:
+        await asyncio.gather(
+            panel.traffic(args.scene_rate, args.press_rate, args.seed),
+            asyncio.Event().wait(),  # serve until interrupted
+        )
+    finally:
+        await panel.close()
+        print(f"stats: {panel.stats}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Centralite panel emulator (socket://)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--no-pacing", action="store_true", help="send at socket speed instead of 19200 baud")
+    parser.add_argument("--response-delay", type=float, default=0.0, help="ms before the panel acts on a command")
+    parser.add_argument("--scene-rate", type=float, default=0.0, help="random scene recalls per second")
+    parser.add_argument("--press-rate", type=float, default=0.0, help="random button press/release pairs per second")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
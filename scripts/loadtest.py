@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: the real Centralite class against scripts/emulator.py.
+
+Measures, over a paced 19200 baud socket:
+  * command-to-echo latency: activate_load_at() until the ^K echo reaches a handler
+  * sustained events/sec under scene floods, and how many ^K frames were
+    coalesced, dropped or lost before reaching handlers
+
+    python scripts/loadtest.py                       # asyncio mode, as Home Assistant runs it
+    python scripts/loadtest.py --threaded            # reader/dispatcher threads
+    python scripts/loadtest.py --handler-cost 2      # 2 ms per handler call, to back up the queue
+
+Needs pyserial (and pyserial-asyncio-fast for asyncio mode), not Home Assistant.
+--threaded numbers are pessimistic: pyserial's socket:// reports in_waiting as
+0 or 1, so the reader thread drains one byte per READ_GRACE instead of whole
+frames as it does on a real serial port.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+
+from benchmark import load
+from emulator import PanelEmulator
+
+LATENCY_LOAD = 1
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def _connect(pc, url: str, threaded: bool, command_window: float):
+    if threaded:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: pc.Centralite(url, command_window=command_window))
+    ctrl = pc.Centralite(url, loop=asyncio.get_running_loop(), command_window=command_window)
+    await ctrl.async_connect()
+    return ctrl
+
+
+async def measure_latency(ctrl, samples: int, threaded: bool) -> list[float]:
+    loop = asyncio.get_running_loop()
+    waiting: dict[int, asyncio.Future] = {}
+
+    def on_level(msg):
+        future = waiting.pop(msg.level, None)
+        if future is not None and not future.done():
+            future.set_result(time.perf_counter())
+
+    handler = (lambda msg: loop.call_soon_threadsafe(on_level, msg)) if threaded else on_level
+    unsubscribe = ctrl.on_load_change(LATENCY_LOAD, handler)
+    results = []
+    try:
+        for i in range(samples):
+            level = 10 + i % 80
+            future = waiting[level] = loop.create_future()
+            start = time.perf_counter()
+            ctrl.activate_load_at(LATENCY_LOAD, level, 0)
+            try:
+                results.append(await asyncio.wait_for(future, 2.0) - start)
+            except asyncio.TimeoutError:
+                waiting.pop(level, None)
+    finally:
+        unsubscribe()
+    return results
+
+
+async def measure_throughput(ctrl, panel: PanelEmulator, args) -> dict:
+    delivered = 0
+
+    def on_level(msg):
+        nonlocal delivered
+        delivered += 1
+        if args.handler_cost:
+            _busy(args.handler_cost / 1000)
+
+    unsubscribes = [ctrl.on_load_change(n, on_level) for n in range(1, 193)]
+    sent_before = panel.stats["load_frames"]
+    coalesced_before, dropped_before = ctrl.events_coalesced, ctrl.events_dropped
+
+    start = time.perf_counter()
+    traffic = asyncio.create_task(panel.traffic(args.scene_rate, args.press_rate, seed=1))
+    await asyncio.sleep(args.duration)
+    traffic.cancel()
+    # Let the paced line and the dispatcher drain
+    last = -1
+    while delivered != last:
+        last = delivered
+        await asyncio.sleep(0.5)
+    elapsed = time.perf_counter() - start
+    for unsubscribe in unsubscribes:
+        unsubscribe()
+
+    sent = panel.stats["load_frames"] - sent_before
+    coalesced = ctrl.events_coalesced - coalesced_before
+    dropped = ctrl.events_dropped - dropped_before
+    return {
+        "sent": sent,
+        "delivered": delivered,
+        "coalesced": coalesced,
+        "dropped": dropped,
+        "lost": sent - delivered - coalesced - dropped,
+        "elapsed": elapsed,
+    }
+
+
+def _ms(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+async def run(args: argparse.Namespace) -> int:
+    pc = load("pycentralite")
+    panel = PanelEmulator(pacing=not args.no_pacing, response_delay=args.response_delay / 1000)
+    host, port = await panel.start()
+    ctrl = await _connect(pc, f"socket://{host}:{port}", args.threaded, args.command_window / 1000)
+    mode = "threaded" if args.threaded else "asyncio"
+    print(f"{mode} mode, command window {args.command_window:g} ms, "
+          f"{'paced 19200 baud' if not args.no_pacing else 'unpaced'}")
+    try:
+        latency = await measure_latency(ctrl, args.samples, args.threaded)
+        if latency:
+            print(f"latency   n={len(latency)} timeouts={args.samples - len(latency)} "
+                  f"p50={_ms(latency, 0.5):.1f} ms p95={_ms(latency, 0.95):.1f} ms "
+                  f"max={max(latency) * 1000:.1f} ms mean={statistics.mean(latency) * 1000:.1f} ms")
+        else:
+            print("latency   no echoes received")
+
+        result = await measure_throughput(ctrl, panel, args)
+        sent = result["sent"] or 1
+        print(f"flood     {result['sent']} ^K frames in {result['elapsed']:.1f} s, "
+              f"{result['delivered'] / result['elapsed']:.0f} events/s delivered")
+        print(f"          coalesced={result['coalesced']} ({result['coalesced'] / sent:.1%}) "
+              f"dropped={result['dropped']} ({result['dropped'] / sent:.1%}) "
+              f"lost={result['lost']} ({result['lost'] / sent:.1%})")
+        return 1 if result["lost"] or len(latency) < args.samples else 0
+    finally:
+        ctrl.close()
+        await panel.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Centralite end-to-end load test against the emulator")
+    parser.add_argument("--threaded", action="store_true", help="use the reader/dispatcher threads instead of asyncio")
+    parser.add_argument("--samples", type=int, default=100, help="latency round trips")
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds of scene flood")
+    parser.add_argument("--scene-rate", type=float, default=10.0, help="scene recalls per second during the flood")
+    parser.add_argument("--press-rate", type=float, default=2.0, help="button press/release pairs per second")
+    parser.add_argument("--handler-cost", type=float, default=0.0, help="ms of CPU burnt per handler call")
+    parser.add_argument("--command-window", type=float, default=20.0, help="controller command_window in ms")
+    parser.add_argument("--response-delay", type=float, default=0.0, help="emulated panel think time in ms")
+    parser.add_argument("--no-pacing", action="store_true", help="run the emulator at socket speed")
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
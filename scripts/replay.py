@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Replay a wire capture (centralite.start_capture) through the Centralite reader
+and dispatcher, without Home Assistant or a panel.
+
+    python scripts/replay.py centralite_capture_<entry>.bin               # original timing
+    python scripts/replay.py centralite_capture_<entry>.bin --speed 100   # 100x faster
+    python scripts/replay.py capture.bin --speed 0 --handler-cost 1       # flat out, 1 ms handlers
+
+Rotated files (.1, .2, ...) next to the capture are replayed first, oldest first.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+import time
+
+from benchmark import load
+
+
+def _busy(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+async def run(args: argparse.Namespace) -> int:
+    pc = load("pycentralite")
+    paths = pc.capture_files(args.capture)
+    if not paths:
+        print(f"no capture at {args.capture}")
+        return 1
+
+    ctrl = pc.Centralite("loop://", loop=asyncio.get_running_loop())  # asyncio mode, never connected
+    delivered = 0
+
+    def handler(msg):
+        nonlocal delivered
+        delivered += 1
+        if args.handler_cost:
+            _busy(args.handler_cost / 1000)
+
+    for n in range(1, args.loads + 1):
+        ctrl.on_load_change(n, handler)
+    for n in range(1, args.switches + 1):
+        ctrl.on_switch_pressed(n, handler)
+        ctrl.on_switch_released(n, handler)
+
+    frames, elapsed = await pc.async_replay_capture(ctrl, paths, args.speed)
+    print(f"replayed {len(paths)} file(s), {frames} frames in {elapsed:.2f} s "
+          f"({frames / elapsed if elapsed else 0:.0f} frames/s) at speed {args.speed:g}")
+    print(f"events delivered={delivered} coalesced={ctrl.events_coalesced} dropped={ctrl.events_dropped}, "
+          f"pushes={ctrl.push_count}, loads on={bin(ctrl.state.load_mask).count('1')}")
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Replay a Centralite wire capture")
+    parser.add_argument("capture", help="capture file written by centralite.start_capture")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale; 0 replays as fast as possible")
+    parser.add_argument("--loads", type=int, default=192, help="loads with a subscribed handler")
+    parser.add_argument("--switches", type=int, default=0, help="switches with subscribed handlers")
+    parser.add_argument("--handler-cost", type=float, default=0.0, help="ms of CPU burnt per handler call")
+    return asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,35 @@
+"""
+The codec and controller modules only need pyserial, so they are imported straight from
+custom_components/centralite as a bare package, without running the integration's
+__init__.py (which needs Home Assistant).
+"""
+from __future__ import annotations
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+import pytest
+
+COMPONENT = Path(__file__).resolve().parents[1] / "custom_components" / "centralite"
+_PKG = "centralite_tests"
+
+
+def load(module: str):
+    if _PKG not in sys.modules:
+        pkg = types.ModuleType(_PKG)
+        pkg.__path__ = [str(COMPONENT)]
+        sys.modules[_PKG] = pkg
+    return importlib.import_module(f"{_PKG}.{module}")
+
+
+@pytest.fixture(scope="session")
+def codec():
+    return load("codec")
+
+
+@pytest.fixture(scope="session")
+def pc():
+    pytest.importorskip("serial")
+    return load("pycentralite")
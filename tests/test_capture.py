@@ -0,0 +1,71 @@
+"""Wire capture files: rotation, reading back, and backups from an earlier capture."""
+from __future__ import annotations
+
+
+def _records(pc, path):
+    return [(direction, data) for paths in pc.capture_files(path) for _, direction, data in pc.read_capture(paths)]
+
+
+def test_capture_round_trip_with_rotation(pc, tmp_path):
+    path = tmp_path / "cap.bin"
+    recorder = pc.WireRecorder(path, max_bytes=4096, backups=2)
+    frames = [b"^K%03d50\r" % n for n in range(1, 401)]  # ~ 7 KB with headers: one rotation
+    for frame in frames:
+        recorder.inbound(frame)
+    recorder.outbound(b"^A001\r")
+    recorder.close()
+
+    assert recorder.records == len(frames) + 1
+    assert [p.rsplit("/", 1)[-1] for p in pc.capture_files(path)] == ["cap.bin.1", "cap.bin"]
+    got = _records(pc, path)
+    assert [data for direction, data in got if direction == pc.CAPTURE_IN] == frames
+    assert got[-1] == (pc.CAPTURE_OUT, b"^A001\r")
+
+
+def test_new_capture_clears_old_backups(pc, tmp_path):
+    path = tmp_path / "cap.bin"
+    for n in (1, 2, 3):
+        (tmp_path / f"cap.bin.{n}").write_bytes(pc.CAPTURE_MAGIC)
+    recorder = pc.WireRecorder(path, backups=3)
+    recorder.inbound(b"P0012\r")
+    recorder.close()
+    assert pc.capture_files(path) == [str(path)]
+    assert _records(pc, path) == [(pc.CAPTURE_IN, b"P0012\r")]
+
+
+def test_records_after_close_are_ignored(pc, tmp_path):
+    recorder = pc.WireRecorder(tmp_path / "cap.bin")
+    recorder.close()
+    recorder.inbound(b"P0012\r")
+    recorder.close()
+    assert recorder.records == 0
+
+
+def test_close_never_blocks_after_writer_failure(pc, tmp_path, monkeypatch):
+    recorder = pc.WireRecorder(tmp_path / "cap.bin")
+
+    def fail(*args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(recorder, "_write", fail)
+    recorder.inbound(b"P0012\r")
+    recorder._writer.join(2)
+    assert not recorder._writer.is_alive()
+    for _ in range(pc.CAPTURE_QUEUE_LEN + 10):  # would fill the queue if still accepted
+        recorder.inbound(b"P0012\r")
+    assert recorder._queue.empty()
+    recorder.close(wait=False)
+    recorder.close()
+
+
+def test_close_with_full_queue_does_not_block(pc, tmp_path, monkeypatch):
+    recorder = pc.WireRecorder(tmp_path / "cap.bin")
+    writing = pc.threading.Event()
+    monkeypatch.setattr(recorder, "_write", lambda *args: writing.wait(5))
+    for _ in range(pc.CAPTURE_QUEUE_LEN + 10):
+        recorder.inbound(b"P0012\r")
+    assert recorder.dropped
+    recorder.close(wait=False)  # returns although the queue is full
+    writing.set()
+    recorder._writer.join(5)
+    assert not recorder._writer.is_alive()
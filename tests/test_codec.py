@@ -0,0 +1,121 @@
+"""Frame parsing, framing and panel state: the parts of the link that run without Home Assistant."""
+from __future__ import annotations
+
+import pytest
+
+
+# ---- parse_frame ------------------------------------------------------------
+def test_parse_push_frames(codec):
+    assert codec.parse_frame(b"^K01255") == codec.LoadLevel(12, 55)
+    assert codec.parse_frame(b"P0075") == codec.SwitchPress(75)
+    assert codec.parse_frame(b"R0384") == codec.SwitchRelease(384)
+
+
+def test_parse_replies(codec):
+    assert codec.parse_frame(b"042") == codec.LevelReply(42)
+    loads = codec.parse_frame(b"03" + b"00" * 23)
+    assert isinstance(loads, codec.LoadBitmap)
+    assert (loads.mask, loads.width) == (0b11, 192)
+    switches = codec.parse_frame(b"80" + b"00" * 47)
+    assert isinstance(switches, codec.SwitchBitmap)
+    assert (switches.mask, switches.width) == (1 << 7, 384)
+
+
+@pytest.mark.parametrize(
+    "frame",
+    [
+        b"^K-0199",  # sign
+        b"^K 1255",  # whitespace
+        b"^K01_55",
+        b"^K00055",  # load 000
+        b"P0000",  # switch 000
+        b"R0000",
+        b"P-075",
+        b"^K0125",  # short
+        b"xyz",
+        b"",
+        b"\xff\xfe",
+        b"zz" + b"00" * 23,  # 48 chars, not hex
+    ],
+)
+def test_parse_rejects_malformed(codec, frame):
+    assert isinstance(codec.parse_frame(frame), codec.Unknown)
+
+
+def test_encode_commands(codec):
+    assert codec.SetLoadLevel(12, 55, 1).encode() == "^E0125501"
+    assert codec.ActivateLoad(3).encode() == "^A003"
+    assert codec.QueryLoads().encode() == "^G"
+
+
+# ---- FrameParser -------------------------------------------------------------
+def test_frames_split_across_reads(pc):
+    parser = pc.FrameParser()
+    assert parser.feed(b"^K001") == []
+    assert parser.pending
+    assert parser.feed(b"50\r^K00260\rP00") == [b"^K00150", b"^K00260"]
+    assert parser.feed(b"12\r") == [b"P0012"]
+    assert not parser.pending
+
+
+def test_overlong_tail_keeps_complete_frames(pc):
+    parser = pc.FrameParser()
+    assert parser.feed(b"^K00150\r^K00260\r" + b"x" * 120) == [b"^K00150", b"^K00260"]
+    # the rest of the garbage run, up to its CR, is dropped; framing resumes after it
+    assert parser.feed(b"yy\r^K00370\r") == [b"^K00370"]
+    assert parser.discarded == 1
+
+
+def test_overlong_run_without_cr_is_dropped(pc):
+    parser = pc.FrameParser()
+    assert parser.feed(b"x" * 200) == []
+    assert parser.feed(b"x\r^K00150\r") == [b"^K00150"]
+
+
+def test_noise_around_frames_is_stripped(pc):
+    parser = pc.FrameParser()
+    assert parser.feed(b"\n^K00150\r\x00\r \r") == [b"^K00150"]
+
+
+# ---- CentraliteState ---------------------------------------------------------
+def test_set_level_reports_changes(pc):
+    state = pc.CentraliteState()
+    assert state.set_level(5, 40)
+    assert not state.set_level(5, 40)
+    assert state.load_on(5) and state.load_level(5) == 40
+    assert state.set_level(5, 0)
+    assert state.load_on(5) is False and state.load_level(5) == 0
+
+
+def test_state_grows_past_one_board(pc):
+    state = pc.CentraliteState()
+    assert state.set_level(400, 10)
+    assert state.load_level(400) == 10
+
+
+def test_load_bitmap_diff(pc):
+    state = pc.CentraliteState()
+    state.set_level(2, 60)
+    turned_on, turned_off = state.apply_load_bitmap(0b101, 192)
+    assert list(pc.iter_bits(turned_on)) == [1, 3]
+    assert list(pc.iter_bits(turned_off)) == [2]
+    assert state.load_on(1) and state.load_level(1) is None  # on, level not known yet
+    assert state.load_level(2) == 0
+    assert state.load_on(193) is None  # outside the snapshot
+
+
+def test_switch_bitmap_baseline_then_diff(pc):
+    state = pc.CentraliteState()
+    assert state.apply_switch_bitmap(0b10, 384) == (0, 0)  # first ^H is the baseline
+    assert state.apply_switch_bitmap(0b01, 384) == (0b01, 0b10)
+    assert state.set_switch(5, True) and not state.set_switch(5, True)
+    assert state.switch_on(5)
+
+
+def test_zero_load_frame_does_not_reach_state(pc):
+    ctrl = pc.Centralite("loop://", loop=object())  # asyncio mode, never connected
+    seen = []
+    ctrl.on_load_change(5, seen.append)
+    ctrl._handle_frame(b"^K00055")
+    ctrl._handle_frame(b"P0000")
+    assert ctrl.state.version == 0
@@ -0,0 +1,247 @@
+"""Centralite's reply matcher, command queue and event hand-off, driven through _handle_frame.
+
+The controller runs in asyncio mode on a loop that is never started, with a fake transport
+that keeps what would have gone to the panel; replies are fed in with _handle_frame.
+"""
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import time
+
+import pytest
+
+
+class FakeTransport:
+    def __init__(self):
+        self.writes: list[bytes] = []
+
+    def write(self, data):
+        self.writes.append(data)
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def ctrl(pc, loop):
+    ctrl = pc.Centralite("loop://", loop=loop, command_window=0)
+    ctrl._transport = FakeTransport()
+    ctrl._link_up = True
+    return ctrl
+
+
+def submit(ctrl, query):
+    return ctrl._submit(query, concurrent.futures.Future())
+
+
+def result(entry):
+    return entry[1].result(timeout=0) if entry[1].done() else "pending"
+
+
+# ---- pending timeouts --------------------------------------------------------
+def test_tombstones_do_not_stretch_later_timeouts(pc, ctrl):
+    # a ^G that timed out long ago and whose late reply never came
+    lost = submit(ctrl, pc.QueryLoads())
+    ctrl._query_timed_out(lost)
+    ctrl._pending[0] = (pc.LoadBitmap, None, time.monotonic() - pc.WAIT_DELAY - 1, lost[3])
+    # a recent one, still waiting for its late reply
+    ctrl._query_timed_out(submit(ctrl, pc.QueryLoads()))
+
+    entry = submit(ctrl, pc.QueryLoadLevel(1))
+    assert entry[3] == ctrl.reply_timeout(pc.LevelReply)
+    assert len(ctrl._pending) == 2  # the expired tombstone is gone, the recent one stays
+
+
+def test_pipelined_queries_wait_for_those_ahead(pc, ctrl):
+    ctrl._estimator(pc.LevelReply).observe(0.1)  # srtt 0.1 s, rttvar 0.05 s: 0.3 s per ^F
+    step = ctrl.reply_timeout(pc.LevelReply)
+    entries = [submit(ctrl, pc.QueryLoadLevel(n)) for n in (1, 2, 3)]
+    assert [e[3] for e in entries] == pytest.approx([step, 2 * step, 3 * step])
+    assert ctrl._transport.writes == [b"^F001\r", b"^F002\r", b"^F003\r"]
+    # with nothing measured each query may take WAIT_DELAY, and the sum is capped there
+    assert submit(ctrl, pc.QueryLoads())[3] == pc.WAIT_DELAY
+
+
+def test_pipelined_timeouts_on_the_loop(pc, ctrl, loop):
+    ctrl._estimator(pc.LevelReply).observe(0.01)  # floor: REPLY_TIMEOUT_MIN per ^F
+
+    async def run():
+        first = asyncio.ensure_future(ctrl._async_sendrecv(pc.QueryLoadLevel(1)))
+        second = asyncio.ensure_future(ctrl._async_sendrecv(pc.QueryLoadLevel(2)))
+        await asyncio.sleep(0)
+        ctrl._handle_frame(b"042")  # only the first one is answered
+        return await first, await second
+
+    first, second = loop.run_until_complete(run())
+    assert first.level == 42 and second is None
+    assert ctrl.query_timeouts == 1
+    assert [e[1] for e in ctrl._pending] == [None]  # the second one's tombstone
+
+
+# ---- reply matching ------------------------------------------------------------
+def test_replies_go_to_the_oldest_query_of_their_type(pc, ctrl):
+    level1 = submit(ctrl, pc.QueryLoadLevel(1))
+    loads = submit(ctrl, pc.QueryLoads())
+    level2 = submit(ctrl, pc.QueryLoadLevel(2))
+    ctrl._handle_frame(b"010")
+    ctrl._handle_frame(b"03" + b"00" * 23)
+    ctrl._handle_frame(b"020")
+    assert result(level1).level == 10 and result(level2).level == 20
+    assert result(loads).mask == 0b11
+    assert not ctrl._pending
+
+
+def test_other_reply_types_do_not_unblock_a_query(pc, ctrl):
+    level = submit(ctrl, pc.QueryLoadLevel(1))
+    ctrl._handle_frame(b"03" + b"00" * 23)  # a ^G answer nobody asked for
+    ctrl._handle_frame(b"^K00150")  # and a push
+    assert result(level) == "pending"
+    ctrl._handle_frame(b"050")
+    assert result(level).level == 50
+
+
+def test_late_reply_is_swallowed_by_its_tombstone(pc, ctrl):
+    timed_out = submit(ctrl, pc.QueryLoadLevel(1))
+    ctrl._query_timed_out(timed_out)
+    assert result(timed_out) == "pending"  # the caller already got None
+    live = submit(ctrl, pc.QueryLoadLevel(2))
+    ctrl._handle_frame(b"010")  # load 1's late answer
+    assert result(live) == "pending"
+    assert live in ctrl._suspects
+    ctrl._handle_frame(b"020")
+    assert result(live).level == 20
+    assert not ctrl._pending and not ctrl._suspects
+
+
+def test_suspect_timeout_leaves_no_tombstone(pc, ctrl):
+    ctrl._query_timed_out(submit(ctrl, pc.QueryLoadLevel(1)))
+    suspect = submit(ctrl, pc.QueryLoadLevel(2))
+    ctrl._handle_frame(b"010")  # swallowed; may have been the suspect's own answer
+    ctrl._query_timed_out(suspect)
+    assert not ctrl._pending and not ctrl._suspects
+    # no cascade: the next query gets the next reply
+    nxt = submit(ctrl, pc.QueryLoadLevel(3))
+    ctrl._handle_frame(b"030")
+    assert result(nxt).level == 30
+
+
+def test_expired_tombstone_does_not_swallow(pc, ctrl):
+    lost = submit(ctrl, pc.QueryLoadLevel(1))
+    ctrl._query_timed_out(lost)
+    ctrl._pending[0] = (pc.LevelReply, None, time.monotonic() - pc.WAIT_DELAY - 1, lost[3])
+    ctrl._pending.append((pc.LevelReply, concurrent.futures.Future(), time.monotonic(), 1.0))
+    live = ctrl._pending[1]
+    ctrl._handle_frame(b"020")
+    assert result(live).level == 20
+    assert not ctrl._pending
+
+
+def test_unsolicited_reply_is_ignored(pc, ctrl):
+    ctrl._handle_frame(b"042")
+    assert not ctrl._pending
+    level = submit(ctrl, pc.QueryLoadLevel(1))
+    ctrl._handle_frame(b"043")
+    assert result(level).level == 43
+
+
+def test_fail_pending_answers_none(pc, ctrl):
+    ctrl._query_timed_out(submit(ctrl, pc.QueryLoadLevel(1)))
+    suspect = submit(ctrl, pc.QueryLoadLevel(2))
+    loads = submit(ctrl, pc.QueryLoads())
+    ctrl._handle_frame(b"010")
+    assert suspect in ctrl._suspects
+    ctrl._fail_pending()
+    assert result(suspect) is None and result(loads) is None
+    assert not ctrl._pending and not ctrl._suspects
+
+
+def test_queries_are_not_written_while_the_link_is_down(pc, ctrl, loop):
+    ctrl._link_up = False
+    assert loop.run_until_complete(ctrl._async_sendrecv(pc.QueryLoadLevel(1))) is None
+    assert not ctrl._transport.writes and not ctrl._pending
+
+
+# ---- command queue -------------------------------------------------------------
+@pytest.fixture
+def windowed(pc, loop):
+    ctrl = pc.Centralite("loop://", loop=loop, command_window=0.02, stack_max_len=20)
+    ctrl._transport = FakeTransport()
+    ctrl._link_up = True
+    return ctrl
+
+
+def test_load_commands_coalesce_until_a_barrier(pc, windowed):
+    windowed._send(pc.SetLoadLevel(1, 20, 1))
+    windowed._send(pc.ActivateLoad(2))
+    windowed._send(pc.SetLoadLevel(1, 60, 1))  # replaces the queued ^E for load 1 in place
+    windowed._send(pc.ActivateScene(4))  # barrier
+    windowed._send(pc.DeactivateLoad(1))  # after the scene, so queued separately
+    assert not windowed._transport.writes  # nothing goes out before the window closes
+    windowed._flush_commands()
+    assert windowed._transport.writes == [b"^E0016001^A002^C004\r", b"^B001\r"]  # split at 20 chars
+
+
+def test_query_flushes_queued_commands_first(pc, windowed):
+    windowed._send(pc.ActivateLoad(1))
+    submit(windowed, pc.QueryLoadLevel(1))
+    assert windowed._transport.writes == [b"^A001\r", b"^F001\r"]
+    assert windowed._flush_timer is None
+
+
+def test_commands_while_link_down_are_dropped(pc, ctrl):
+    ctrl._link_up = False
+    ctrl._send(pc.ActivateLoad(1))
+    assert not ctrl._transport.writes
+    assert ctrl.metrics.writes_dropped == 1
+
+
+# ---- DispatchQueue -------------------------------------------------------------
+def test_dispatch_queue_coalesces_load_events(pc):
+    q = pc.DispatchQueue()
+    assert q.put(pc.EVENT_LOAD, 1, pc.LoadLevel(1, 10))  # empty before: wake the consumer
+    assert not q.put(pc.EVENT_LOAD, 2, pc.LoadLevel(2, 10))
+    assert not q.put(pc.EVENT_LOAD, 1, pc.LoadLevel(1, 30))
+    q.put(pc.EVENT_PRESS, 5, pc.SwitchPress(5))
+    q.put(pc.EVENT_PRESS, 5, pc.SwitchPress(5))  # switch events are never merged
+    batch = list(q.drain())
+    assert [(kind, index) for kind, index, _ in batch] == [
+        (pc.EVENT_LOAD, 1), (pc.EVENT_LOAD, 2), (pc.EVENT_PRESS, 5), (pc.EVENT_PRESS, 5)
+    ]
+    assert batch[0][2].level == 30
+    assert q.coalesced == 1 and not len(q)
+
+
+def test_dispatch_queue_drops_when_full(pc):
+    q = pc.DispatchQueue(maxlen=2)
+    q.put(pc.EVENT_PRESS, 1, pc.SwitchPress(1))
+    q.put(pc.EVENT_PRESS, 2, pc.SwitchPress(2))
+    assert not q.put(pc.EVENT_PRESS, 3, pc.SwitchPress(3))
+    assert not q.put(pc.EVENT_LOAD, 4, pc.LoadLevel(4, 10))
+    assert q.dropped == 2
+    assert [index for _, index, _ in q.drain()] == [1, 2]
+    assert q.put(pc.EVENT_PRESS, 3, pc.SwitchPress(3))  # room again after a drain
+
+
+# ---- ^F replies --------------------------------------------------------------
+def test_level_query_reply_fires_load_event_on_change(pc, ctrl, loop):
+    seen = []
+    ctrl.on_load_change(1, lambda msg: seen.append(msg.level))
+
+    async def query(reply):
+        task = asyncio.ensure_future(ctrl.async_get_load_level(1, max_age=0))
+        await asyncio.sleep(0)
+        ctrl._handle_frame(reply)
+        level = await task
+        await asyncio.sleep(0)  # let the dispatcher run
+        return level
+
+    assert loop.run_until_complete(query(b"040")) == 40
+    assert loop.run_until_complete(query(b"040")) == 40  # unchanged: no second event
+    assert loop.run_until_complete(query(b"000")) == 0
+    assert seen == [40, 0]
+    assert ctrl.state.load_level(1) == 0